@@ -1,6 +1,9 @@
 # app/analytics.py
 import hashlib
-from typing import Dict
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
 
 # ---------- deterministic utilities ----------
 def _seed_from_id(s: str) -> int:
@@ -12,6 +15,11 @@ def _pseudo_uniform(seed: int, a: float = 0.0, b: float = 1.0) -> float:
     x = (1103515245 * seed + 12345) & 0x7FFFFFFF
     return a + (x / 0x7FFFFFFF) * (b - a)
 
+def region_bias(region: str) -> int:
+    # -5..+5 from the md5 seed, so every process (and every run) agrees;
+    # builtin hash() of a str is salted per process
+    return (_seed_from_id(region) % 11) - 5
+
 # ---------- scores ----------
 def severity_0_100(customer_id: str, region: str) -> int:
     """
@@ -20,10 +28,10 @@ def severity_0_100(customer_id: str, region: str) -> int:
     Deterministic per (customer, region).
     """
     base = 50
-    region_bias = (hash(region) % 11) - 5   # -5..+5
+    bias = region_bias(region)   # -5..+5
     seed = _seed_from_id(customer_id + "|" + region)
     jitter = int(_pseudo_uniform(seed, -15, 15))
-    s = max(0, min(100, base + region_bias + jitter))
+    s = max(0, min(100, base + bias + jitter))
     return s
 
 def crs_0_1(customer_id: str) -> float:
@@ -45,7 +53,68 @@ def final_risk(cpi: int, sev: int, crs: float) -> float:
     """
     return round(0.5 * cpi + 0.3 * sev + 0.2 * (crs * 100), 2)
 
+# ---------- competitive pressure (CPI) ----------
+def score_cpi(contract_days_remaining: int,
+              price_sensitivity_flag: bool,
+              peer_port_count_30d: int,
+              weekly_ad_intensity_index: float) -> int:
+    """
+    Competitive Pressure Index (0–100), reference scalar formula:
+      CPI = 0.35*days_term + 0.25*price_term + 0.25*peer_term + 0.15*ad_term
+    """
+    days = int(contract_days_remaining)
+    price = 1 if bool(price_sensitivity_flag) else 0
+    peer_ports = int(peer_port_count_30d)
+    ad_idx = float(weekly_ad_intensity_index)
+
+    days_term = max(0, 100 - min(days, 100))
+    price_term = 100 if price == 1 else 0
+    peer_term = min(peer_ports * 10, 100)
+    ad_term = int(round(min(ad_idx * 10, 100)))
+
+    cpi = int(round(0.35*days_term + 0.25*price_term + 0.25*peer_term + 0.15*ad_term))
+    return min(max(cpi, 0), 100)
+
+def _int_column(values, name: str) -> np.ndarray:
+    # int(x) per element: truncates floats, refuses NaN/None/inf like the scalar does
+    a = np.asarray(values)
+    if a.dtype.kind in "iub":
+        return a.astype(np.int64)
+    f = a.astype(np.float64)
+    if not np.isfinite(f).all():
+        raise ValueError(f"{name} has missing or non-finite values")
+    return f.astype(np.int64)
+
+def cpi_batch(contract_days_remaining, price_sensitivity_flag,
+              peer_port_count_30d, weekly_ad_intensity_index) -> np.ndarray:
+    """
+    Columnar score_cpi → int64 array (same float ops; round() is half-even like rint).
+    Raises ValueError where score_cpi would raise: a NaN/None/inf count or a NaN / -inf ad index.
+    """
+    days = _int_column(contract_days_remaining, "contract_days_remaining")
+    price = np.asarray(price_sensitivity_flag).astype(bool)
+    peer_ports = _int_column(peer_port_count_30d, "peer_port_count_30d")
+    ad_idx = np.asarray(weekly_ad_intensity_index).astype(np.float64)
+
+    days_term = np.maximum(0, 100 - np.minimum(days, 100))
+    price_term = np.where(price, 100, 0)
+    peer_term = np.minimum(peer_ports * 10, 100)
+    ad_capped = np.minimum(ad_idx * 10, 100)
+    if not np.isfinite(ad_capped).all():
+        raise ValueError("weekly_ad_intensity_index has missing or -inf values")
+    ad_term = np.rint(ad_capped).astype(np.int64)
+
+    cpi = np.rint(0.35*days_term + 0.25*price_term + 0.25*peer_term + 0.15*ad_term).astype(np.int64)
+    return np.clip(cpi, 0, 100)
+
 # ---------- action router ----------
+PROPOSED_TEXT = (
+    "We can review your plan and check your line where needed. "
+    "Would you like us to schedule a priority callback? "
+    "Credits, if any, are a one-time credit, subject to account review; "
+    "availability can vary by account and region."
+)
+
 def route_action(cpi: int, sev: int, crs: float) -> Dict:
     """
     Policy-safe routing (cheap first, no guarantees).
@@ -66,10 +135,159 @@ def route_action(cpi: int, sev: int, crs: float) -> Dict:
         reason = "Moderate risk; review options before committing credits."
         cost = 0
 
-    msg = (
-        "We can review your plan and check your line where needed. "
-        "Would you like us to schedule a priority callback? "
-        "Credits, if any, are a one-time credit, subject to account review; "
-        "availability can vary by account and region."
-    )
+    msg = PROPOSED_TEXT
     return {"action": action, "reason": reason, "proposed_text": msg, "estimated_action_cost_usd": cost}
+
+# ---------- top-K selection ----------
+def top_k_indices(values, k: Optional[int]) -> np.ndarray:
+    """
+    Positions of the k largest values, largest first; ties keep input order
+    (same result as a stable descending sort followed by .head(k)).
+    Uses argpartition, so only the candidates at or above the k-th value get sorted.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if k is None or k >= n:
+        cand = np.arange(n)
+    else:
+        k = k if k >= 0 else max(n + k, 0)  # negative k behaves like DataFrame.head
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        kth = values[np.argpartition(values, n - k)[n - k:]].min()
+        cand = np.flatnonzero(values >= kth)
+    order = cand[np.lexsort((cand, -values[cand].astype(np.float64)))]
+    return order if k is None else order[:k]
+
+# ---------- batch (columnar) scoring ----------
+# Same formulas as the scalar functions above, applied to whole columns.
+# Results are bit-for-bit equal to the scalar path; the few values that land
+# on a 2-decimal rounding tie are re-scored with the scalar function.
+_ROUND_TIE_EPS = 1e-6
+RISK_COLUMNS = [
+    "customer_id", "region", "CPI", "Severity", "CRS", "final_score",
+    "action", "reason", "proposed_text", "estimated_action_cost_usd",
+]
+
+def _seeds_from_ids(ids: Sequence[str]) -> np.ndarray:
+    # low 32 bits of the md5 == last 4 bytes of the digest (see _seed_from_id)
+    return np.fromiter(
+        (int.from_bytes(hashlib.md5(s.encode()).digest()[12:], "big") for s in ids),
+        dtype=np.int64, count=len(ids),
+    )
+
+def _pseudo_uniform_batch(seeds: np.ndarray, a: float = 0.0, b: float = 1.0) -> np.ndarray:
+    x = (1103515245 * seeds + 12345) & 0x7FFFFFFF
+    return a + (x / 0x7FFFFFFF) * (b - a)
+
+def _round_ties(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Mask of values sitting (numerically) on a rounding tie at `ndigits`."""
+    scaled = values * 10**ndigits
+    return np.abs(scaled - np.floor(scaled) - 0.5) < _ROUND_TIE_EPS
+
+def region_biases(regions: Iterable[str]) -> Dict[str, int]:
+    """Severity region bias per distinct region (as in severity_0_100)."""
+    return {r: region_bias(r) for r in set(map(str, regions))}
+
+def severity_batch(customer_ids: Sequence[str], regions: Sequence[str],
+                   bias_by_region: Optional[Dict[str, int]] = None) -> np.ndarray:
+    """Columnar severity_0_100 → int64 array (`bias_by_region` from region_biases, optional)."""
+    customer_ids = [str(c) for c in customer_ids]
+    regions = [str(r) for r in regions]
+    bias_by_region = bias_by_region or region_biases(regions)
+    region_bias = np.fromiter((bias_by_region[r] for r in regions), dtype=np.int64, count=len(regions))
+    seeds = _seeds_from_ids([c + "|" + r for c, r in zip(customer_ids, regions)])
+    jitter = _pseudo_uniform_batch(seeds, -15, 15).astype(np.int64)  # truncates like int()
+    return np.clip(50 + region_bias + jitter, 0, 100)
+
+def crs_batch(customer_ids: Sequence[str]) -> np.ndarray:
+    """Columnar crs_0_1 → float64 array."""
+    customer_ids = [str(c) for c in customer_ids]
+    u = _pseudo_uniform_batch(_seeds_from_ids(customer_ids), 0.0, 1.0)
+    raw = (u**1.5) * 0.9
+    crs = np.minimum(0.95, np.round(raw, 2))
+    for i in np.flatnonzero(_round_ties(raw, 2)):
+        crs[i] = crs_0_1(customer_ids[i])
+    return crs
+
+def final_risk_batch(cpi, sev, crs) -> np.ndarray:
+    """Columnar final_risk → float64 array."""
+    cpi = np.asarray(cpi, dtype=np.int64)
+    sev = np.asarray(sev, dtype=np.int64)
+    crs = np.asarray(crs, dtype=np.float64)
+    raw = 0.5 * cpi + 0.3 * sev + 0.2 * (crs * 100)
+    out = np.round(raw, 2)
+    for i in np.flatnonzero(_round_ties(raw, 2)):
+        out[i] = final_risk(int(cpi[i]), int(sev[i]), float(crs[i]))
+    return out
+
+def route_action_batch(cpi, sev, crs) -> pd.DataFrame:
+    """Columnar route_action → DataFrame[action, reason, proposed_text, estimated_action_cost_usd]."""
+    cpi = np.asarray(cpi)
+    sev = np.asarray(sev)
+    crs = np.asarray(crs)
+    competitive = (cpi >= 80) & (sev < 60)
+    service = ~competitive & ((sev >= 70) | (crs >= 0.8))
+    tech = service & (sev >= 80)
+    callback = service & ~tech
+
+    # resolve labels through the scalar router so the two paths never drift
+    plans = {
+        "competitive": route_action(80, 0, 0.0),
+        "callback": route_action(0, 70, 0.0),
+        "tech": route_action(0, 80, 0.0),
+        "default": route_action(0, 0, 0.0),
+    }
+    conds = [competitive, callback, tech]
+    keys = ["competitive", "callback", "tech"]
+
+    def pick(field, dtype=object):
+        return np.select(conds, [plans[k][field] for k in keys], plans["default"][field]).astype(dtype)
+
+    return pd.DataFrame({
+        "action": pick("action"),
+        "reason": pick("reason"),
+        "proposed_text": PROPOSED_TEXT,
+        "estimated_action_cost_usd": pick("estimated_action_cost_usd", np.int64),
+    })
+
+def severity_crs_batch(customer_ids: Sequence[str], regions: Sequence[str],
+                       bias_by_region: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(severity_batch, crs_batch) for the same rows: the md5 hashing part of scoring."""
+    return severity_batch(customer_ids, regions, bias_by_region), crs_batch(customer_ids)
+
+def score_frame(df: pd.DataFrame, bias_by_region: Optional[Dict[str, int]] = None,
+                scores=None, hasher: Optional[Callable] = None) -> pd.DataFrame:
+    """
+    Score a whole signals frame (needs customer_id, region, CPI) in one pass.
+    Returns RISK_COLUMNS in the input row order; sort/slice is up to the caller.
+    `scores` (a score_table.ScoreTable) supplies precomputed Severity/CRS;
+    only customers missing from it are hashed, by `hasher` (same signature
+    as severity_crs_batch, e.g. the process pool's) if given.
+    """
+    hasher = hasher or severity_crs_batch
+    cids = df["customer_id"].astype(str).to_numpy()
+    regs = df["region"].astype(str).to_numpy()
+    cpi = df["CPI"].to_numpy().astype(np.int64)
+    if scores is None:
+        sev, crs = hasher(cids, regs, bias_by_region)
+    else:
+        sev, crs, found = scores.lookup(cids, regs)
+        miss = np.flatnonzero(~found)
+        if len(miss):
+            sev[miss], crs[miss] = hasher(cids[miss], regs[miss], bias_by_region)
+    plan = route_action_batch(cpi, sev, crs)
+    out = pd.DataFrame({
+        "customer_id": cids,
+        "region": regs,
+        "CPI": cpi,
+        "Severity": sev,
+        "CRS": crs,
+        "final_score": final_risk_batch(cpi, sev, crs),
+    })
+    for col in plan.columns:
+        out[col] = plan[col].to_numpy()
+    return out[RISK_COLUMNS]
+
+def rank_frame(scored: pd.DataFrame) -> pd.DataFrame:
+    """Stable risk ranking: final_score descending, then customer_id ascending."""
+    return scored.sort_values(["final_score", "customer_id"], ascending=[False, True], kind="stable")
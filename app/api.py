@@ -1,28 +1,49 @@
 # app/api.py
+import time
+_IMPORT_T0 = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from typing import Optional, List
 
-from fastapi import FastAPI, Request, Body
+from fastapi import FastAPI, Request, Body, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 
 from pydantic import BaseModel
 from fastapi.responses import FileResponse
 
-# project imports
-from app.langgraph_flow import run_stub_flow
-from app.dataio import load_signals, latest_week
-from app.guardrails import check_message, add_disclaimers
-from app.analytics import severity_0_100, crs_0_1, final_risk, route_action
-from app.logger import append_action
+# project imports — light ones only. pandas/numpy and the data modules
+# (dataio, snapshot, analytics, export, history) are imported inside the
+# handlers that need them and up front by the warm-up (app/warmup.py).
+from app.langgraph_flow import run_stub_flow, run_stub_flow_batch
+from app.guardrails import check_message, check_messages, add_disclaimers
+from app.logger import append_actions, ensure_log, stats as action_log_stats
+from app.config import settings
+from app import audit, metrics, warmup
+from app.metrics import stage
 
-from fastapi.responses import FileResponse, JSONResponse
-import pandas as pd
-import os
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
+import orjson
 
 # -----------------------------------------------------------------------------
 # FastAPI app + WEBSITE (static & Jinja templates)
 # -----------------------------------------------------------------------------
-app = FastAPI(title="T3C", version="0.4.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # WARMUP: background (serve now, /readyz flips later) | blocking | off
+    mode = settings.WARMUP.lower()
+    if mode == "blocking":
+        await run_in_threadpool(warmup.state.run)
+    elif mode == "background":
+        warmup.state.start()
+    else:
+        warmup.state.skip()
+    yield
+
+app = FastAPI(title="T3C", version="0.4.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # serve static assets and templates from /web
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
@@ -33,13 +54,47 @@ templates = Jinja2Templates(directory="web/templates")
 def home_page(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+def _table_response(frame, fmt: str, headers: Optional[dict] = None) -> Response:
+    """
+    Encode a result frame as json (array of records), columnar (column arrays,
+    repeated strings dictionary-encoded) or arrow (IPC stream, needs pyarrow).
+    Bulk results skip FastAPI's jsonable_encoder pass and go straight to orjson.
+    """
+    from app.export import ARROW_MEDIA_TYPE, arrow_ipc_bytes, columnar
+
+    fmt = (fmt or "json").lower()
+    with stage("encode"):
+        if fmt == "json":
+            return ORJSONResponse(frame.to_dict(orient="records"), headers=headers)
+        if fmt == "columnar":
+            return ORJSONResponse(columnar(frame), headers=headers)
+        if fmt == "arrow":
+            try:
+                body = arrow_ipc_bytes(frame)
+            except ImportError:
+                raise HTTPException(status_code=501, detail="format=arrow needs pyarrow installed on the server")
+            return Response(body, media_type=ARROW_MEDIA_TYPE, headers=headers)
+    raise HTTPException(status_code=400, detail="format must be json, columnar or arrow")
+
 # -----------------------------------------------------------------------------
 # Health + simple ticket endpoint (kept)
 # -----------------------------------------------------------------------------
 @app.get("/healthz")
 def healthz():
+    """Liveness: answers as soon as the process serves HTTP, warm or not."""
     return {"status": "ok"}
 
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once data + risk snapshot are warm, 503 before (or if warm-up failed)."""
+    st = warmup.state.status()
+    return ORJSONResponse(st, status_code=200 if st["ready"] else 503)
+
+@app.get("/metrics")
+def metrics_text():
+    """Per-endpoint request and per-stage latency histograms (Prometheus text format)."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 class Ticket(BaseModel):
     ticket_id: str
     customer_id: str
@@ -49,33 +104,99 @@ class Ticket(BaseModel):
 def run_ticket(t: Ticket):
     return run_stub_flow(t.model_dump())
 
+def _ticket_error(rec) -> Optional[str]:
+    """Same acceptance rule as the Ticket model, without building one per record."""
+    if not isinstance(rec, dict):
+        from app.export import JsonRecordError
+        return rec.message if isinstance(rec, JsonRecordError) else "ticket must be a JSON object"
+    for field in ("ticket_id", "customer_id", "text"):
+        if field not in rec:
+            return f"{field}: field required"
+        if not isinstance(rec[field], str):
+            return f"{field}: input should be a valid string"
+    return None
+
+def _triage(records: list, first_index: int) -> bytes:
+    """NDJSON lines for one batch of decoded records, in input order."""
+    errors = [_ticket_error(r) for r in records]
+    results = run_stub_flow_batch(r for r, e in zip(records, errors) if e is None)
+    lines = []
+    for i, (rec, err) in enumerate(zip(records, errors), first_index):
+        if err is None:
+            lines.append(orjson.dumps(next(results)))
+        else:
+            tid = rec.get("ticket_id") if isinstance(rec, dict) else None
+            lines.append(orjson.dumps({"index": i, "ticket_id": tid, "error": err}))
+    return b"\n".join(lines) + b"\n" if lines else b""
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator consumes the request body itself.
+    Starlette's version also awaits receive() to watch for disconnects, which
+    would steal request chunks from the generator, so that part is skipped.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.post("/run_tickets")
+async def run_tickets(request: Request):
+    """
+    Batch /run_ticket for backfills. Body: NDJSON (one ticket per line) or a JSON
+    array of tickets. Streams back one NDJSON line per ticket, in input order and
+    as the body arrives (memory stays bounded); each line is exactly what
+    /run_ticket returns for that ticket. Invalid tickets get an
+    {"index", "ticket_id", "error"} line instead and don't stop the batch.
+    """
+    from app.export import JsonRecordStream
+
+    async def lines():
+        stream, n = JsonRecordStream(), 0
+        try:
+            async for chunk in request.stream():
+                records = stream.feed(chunk)
+                if records:
+                    with stage("tickets.triage"):
+                        out = _triage(records, n)
+                    n += len(records)
+                    yield out
+            records = stream.finish()
+        except ValueError as e:  # malformed JSON array: nothing after this point is usable
+            yield orjson.dumps({"index": n, "ticket_id": None, "error": str(e)}) + b"\n"
+            return
+        with stage("tickets.triage"):
+            out = _triage(records, n)
+        yield out
+
+    return _DuplexStreamingResponse(lines(), media_type="application/x-ndjson")
+
 # -----------------------------------------------------------------------------
 # CPI endpoints
 # -----------------------------------------------------------------------------
 @app.get("/cpi/top")
-def cpi_top(limit: int = 20, region: Optional[str] = None):
+def cpi_top(limit: int = 20, region: Optional[str] = None, format: str = "json"):
     """Top-N customers by CPI for the latest week (optionally filter by region)."""
-    import pandas as pd  # local import to keep module import light
-    df = load_signals()
-    wk = latest_week()
-    sub = df[df["date"] == wk]
-    if region:
-        sub = sub[sub["region"].astype(str) == region]
-    out = (
-        sub.sort_values("CPI", ascending=False)
-           .head(limit)[
-            [
-                "customer_id",
-                "region",
-                "CPI",
-                "contract_days_remaining",
-                "price_sensitivity_flag",
-                "peer_port_count_30d",
-                "weekly_ad_intensity_index",
+    from app.analytics import top_k_indices  # local imports keep module import light
+    from app.dataio import current_signals, latest_week, signals_slice
+    sig = current_signals()  # one consistent version for the whole request
+    sub = signals_slice(week=latest_week(sig), region=region or None, sig=sig)
+    with stage("cpi.top_k"):
+        out = (
+            sub.take(top_k_indices(sub["CPI"].to_numpy(), limit))[
+                [
+                    "customer_id",
+                    "region",
+                    "CPI",
+                    "contract_days_remaining",
+                    "price_sensitivity_flag",
+                    "peer_port_count_30d",
+                    "weekly_ad_intensity_index",
+                ]
             ]
-        ]
-    )
-    return out.to_dict(orient="records")
+        )
+    return _table_response(out, format)
 
 @app.get("/cpi/summary")
 def cpi_summary(
@@ -85,46 +206,74 @@ def cpi_summary(
 ):
     """Summary stats and a short trend over a date window."""
     import pandas as pd
-    df = load_signals()
-    sub = df
-    if region:
-        sub = sub[sub["region"].astype(str) == region]
-    if start:
-        sub = sub[sub["date"] >= pd.to_datetime(start)]
-    if end:
-        sub = sub[sub["date"] <= pd.to_datetime(end)]
+    from app.dataio import current_signals, signals_slice
+    sig = current_signals()
+    start = pd.to_datetime(start) if start else None
+    end = pd.to_datetime(end) if end else None
+    empty = {
+        "records": 0,
+        "avg_cpi": None,
+        "p90_cpi": None,
+        "latest_week": None,
+        "trend": [],
+    }
+    if sig.cpi_rollup is not None:
+        # merge the pre-aggregated (week, region) cells; no row scan
+        with stage("cpi.rollup"):
+            return sig.cpi_rollup.summary(region=region or None, start=start, end=end) or empty
 
+    sub = signals_slice(region=region or None, start=start, end=end, sig=sig)
     if len(sub) == 0:
-        return {
-            "records": 0,
-            "avg_cpi": None,
-            "p90_cpi": None,
-            "latest_week": None,
-            "trend": [],
+        return empty
+
+    with stage("cpi.scan"):
+        agg = {
+            "records": int(len(sub)),
+            "avg_cpi": float(sub["CPI"].mean()),
+            "p90_cpi": int(sub["CPI"].quantile(0.90)),
+            "latest_week": str(sub["date"].max().date()),
         }
-
-    agg = {
-        "records": int(len(sub)),
-        "avg_cpi": float(sub["CPI"].mean()),
-        "p90_cpi": int(sub["CPI"].quantile(0.90)),
-        "latest_week": str(sub["date"].max().date()),
-    }
-    by_week = sub.groupby("date")["CPI"].mean().reset_index().tail(12)
+        by_week = sub.groupby("date")["CPI"].mean().reset_index().tail(12)
     agg["trend"] = [
         {"date": str(d.date()), "avg_cpi": float(v)}
         for d, v in zip(by_week["date"], by_week["CPI"])
     ]
     return agg
 
+@app.get("/cpi/movers")
+def cpi_movers(
+    limit: int = 20,
+    region: Optional[str] = None,
+    week: Optional[str] = None,
+    by: str = "cpi",
+):
+    """Biggest week-over-week CPI (or risk score) increases from the history store."""
+    import pandas as pd
+    from app import history
+    if by not in ("cpi", "risk"):
+        raise HTTPException(status_code=400, detail="by must be 'cpi' or 'risk'")
+    if week:
+        try:
+            day = pd.to_datetime(week)
+            if pd.isna(day):
+                raise ValueError(week)
+        except (ValueError, TypeError, OverflowError):  # DateParseError / OutOfBounds are ValueErrors
+            raise HTTPException(status_code=400, detail="week must be a date (YYYY-MM-DD)")
+        week = str(day.date())
+    with stage("history.movers"):
+        out = history.store.movers(limit=limit, region=region or None, week=week, by=by)
+    if out is None:
+        raise HTTPException(status_code=404, detail="week not in history (run scripts.ingest_history)")
+    return out
+
 @app.get("/cpi/customer/{customer_id}")
 def cpi_for_customer(customer_id: str):
     """Latest CPI row for a specific customer."""
-    df = load_signals()
-    wk = latest_week()
-    sub = df[(df["customer_id"] == customer_id) & (df["date"] == wk)]
-    if sub.empty:
+    from app.dataio import customer_row
+    r = customer_row(customer_id)
+    if r is None:
         return {"found": False}
-    row = sub.iloc[0].to_dict()
+    row = r.to_dict()
     row["found"] = True
     row["date"] = str(row["date"].date())
     return row
@@ -132,164 +281,258 @@ def cpi_for_customer(customer_id: str):
 # -----------------------------------------------------------------------------
 # Insights (risk + compliance)
 # -----------------------------------------------------------------------------
+TOP_RISK_COLUMNS = [
+    "customer_id", "region", "CPI", "Severity", "CRS", "final_score", "action",
+    "reason", "proposed_text", "compliance", "estimated_action_cost_usd",
+]
+
 @app.get("/insights/top_risk")
-def top_risk(limit: int = 20, region: Optional[str] = None, auto_fix: bool = True):
+def top_risk(
+    limit: int = 20,
+    region: Optional[str] = None,
+    auto_fix: bool = True,
+    cursor: Optional[str] = None,
+    format: str = "json",
+):
     """
     Returns top-N customers by blended risk with a policy-safe action.
     If auto_fix=True, missing disclaimers are appended automatically.
+    Ranking is (final_score desc, customer_id asc). When more rows follow, the
+    X-Next-Cursor header holds an opaque cursor; pass it back as ?cursor= to get
+    the next page of the same dataset version.
+    format=columnar|arrow returns column arrays / an Arrow IPC stream instead.
     """
-    df = load_signals()
-    wk = latest_week()
-    sub = df[df["date"] == wk]
-    if region:
-        sub = sub[sub["region"].astype(str) == region]
-
-    rows = []
-    for _, r in sub.iterrows():
-        cid, reg = str(r["customer_id"]), str(r["region"])
-        cpi = int(r["CPI"])
-        sev = severity_0_100(cid, reg)
-        crs = crs_0_1(cid)
-        score = final_risk(cpi, sev, crs)
+    from app.snapshot import decode_cursor, encode_cursor, get_snapshot, snapshot_for_version
+    region = region or None
+    if cursor:
+        try:
+            c = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="malformed cursor")
+        if c["r"] != region:
+            raise HTTPException(status_code=400, detail="cursor was issued for a different region")
+        snap = snapshot_for_version(c["v"])
+        if snap is None:
+            raise HTTPException(status_code=410, detail="cursor expired after a data reload; start from the first page")
+        with stage("risk.page"):
+            table, more = snap.page(region, (c["s"], c["c"]), limit)
+    else:
+        snap = get_snapshot()  # first request per version pays signals.load + risk.*
+        with stage("risk.page"):
+            if limit >= 0:
+                table, more = snap.page(region, None, limit)
+            else:
+                table, more = snap.rows(region, limit), False
+
+    headers = {"X-Dataset-Version": snap.version}
+    if more and len(table):
+        headers["X-Next-Cursor"] = encode_cursor(snap, region, table.iloc[-1])
+
+    text_col, comp_col = ("proposed_text_fixed", "compliance_fixed") if auto_fix else ("proposed_text", "compliance")
+    out = table[["customer_id", "region", "CPI", "Severity", "CRS", "final_score", "action",
+                 "reason", text_col, comp_col, "estimated_action_cost_usd"]]
+    out.columns = TOP_RISK_COLUMNS
+    return _table_response(out, format, headers=headers)
+
+@app.get("/insights/customer/{customer_id}")
+def customer_risk(customer_id: str, auto_fix: bool = True):
+    """Blended risk, routed action and compliance for one customer (latest week)."""
+    from app.analytics import crs_0_1, final_risk, route_action, severity_0_100
+    from app.dataio import current_signals, customer_row
+    sig = current_signals()
+    r = customer_row(customer_id, sig=sig)
+    if r is None:
+        return {"found": False}
+    cid, reg = str(r["customer_id"]), str(r["region"])
+    cpi = int(r["CPI"])
+    with stage("risk.score_one"):
+        hit = sig.scores.get(cid, reg) if sig.scores is not None else None
+        sev, crs = hit if hit is not None else (severity_0_100(cid, reg), crs_0_1(cid))
         plan = route_action(cpi, sev, crs)
 
-        msg = plan["proposed_text"]
-        if auto_fix:
-            msg = add_disclaimers(msg)
-
-        comp = check_message(msg)
-        rows.append(
-            {
-                "customer_id": cid,
-                "region": reg,
-                "CPI": cpi,
-                "Severity": sev,
-                "CRS": crs,
-                "final_score": score,
-                "action": plan["action"],
-                "reason": plan["reason"],
-                "proposed_text": msg,
-                "compliance": comp,
-                "estimated_action_cost_usd": plan["estimated_action_cost_usd"],
-            }
-        )
-
-    rows.sort(key=lambda x: x["final_score"], reverse=True)
-    return rows[:limit]
+    msg = plan["proposed_text"]
+    if auto_fix:
+        msg = add_disclaimers(msg)
+    return {
+        "found": True,
+        "customer_id": cid,
+        "region": reg,
+        "date": str(r["date"].date()),
+        "CPI": cpi,
+        "Severity": sev,
+        "CRS": crs,
+        "final_score": final_risk(cpi, sev, crs),
+        "action": plan["action"],
+        "reason": plan["reason"],
+        "proposed_text": msg,
+        "compliance": check_message(msg),
+        "estimated_action_cost_usd": plan["estimated_action_cost_usd"],
+    }
 
 @app.post("/utils/check_text")
 def check_text(payload: dict = Body(...)):
     txt = payload.get("text", "")
     return check_message(add_disclaimers(txt))
 
+class TextBatch(BaseModel):
+    texts: List[str]
+
+@app.post("/utils/check_text_batch")
+def check_text_batch(payload: TextBatch):
+    """Same as /utils/check_text for many texts at once: {"texts": [...]} → [result, ...]."""
+    return check_messages(payload.texts, auto_fix=True)
+
 # -----------------------------------------------------------------------------
 # Logging approvals to CSV
 # -----------------------------------------------------------------------------
 @app.post("/insights/log")
 def log_actions(payload: List[dict] = Body(...)):
-    for item in payload:
-        append_action(item)
-    return {"ok": True, "logged": len(payload)}
+    # returns after the group commit holding these rows is durable
+    logged = append_actions(payload)
+    return {"ok": True, "logged": logged}
+
+@app.post("/admin/reload")
+def reload_signals(wait: bool = False):
+    """Re-read the signals file now (background by default) and swap it in."""
+    from app.dataio import current_signals, manager
+    started = manager.refresh(wait=wait)
+    return {"ok": True, "started": started, "version": current_signals().version}
+
+@app.get("/admin/memory")
+def signals_memory():
+    """Memory footprint of the live signals frame, per column and per million rows."""
+    from app.dataio import current_signals, memory_footprint
+    sig = current_signals()
+    return {"version": sig.version, **memory_footprint(sig.frame)}
+
+@app.post("/admin/snapshot/invalidate")
+def snapshot_invalidate():
+    """Drop the cached risk snapshot; the next request rebuilds it from disk."""
+    from app.snapshot import invalidate_snapshot
+    invalidate_snapshot()
+    return {"ok": True}
+
+def _audit_range(since: Optional[str], until: Optional[str]):
+    """since/until as stored log timestamps (naive UTC); 400 if either isn't ISO 8601."""
+    out = []
+    for name, value in (("since", since), ("until", until)):
+        try:
+            out.append(audit.normalize_ts(value) if value else None)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or timestamp")
+    return out
+
+@app.get("/admin/actions")
+def admin_actions(
+    customer_id: Optional[str] = None,
+    action: Optional[str] = None,
+    region: Optional[str] = None,
+    passed: Optional[bool] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """
+    Logged approvals from the indexed audit store, newest first.
+    since (inclusive) / until (exclusive) are ISO dates or timestamps (offsets
+    and Z are converted to UTC, like the logged ts). When more
+    rows follow, X-Next-Cursor holds an opaque cursor for ?cursor=.
+    """
+    if audit.store is None:
+        raise HTTPException(status_code=503, detail="audit store disabled (ACTION_LOG_DB is empty)")
+    since, until = _audit_range(since, until)
+    with stage("audit.query"):
+        try:
+            rows, nxt = audit.store.query(
+                limit=min(max(limit, 0), 1000), cursor=cursor, customer_id=customer_id, action=action,
+                region=region, passed=passed, since=since, until=until,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="malformed cursor")
+    return ORJSONResponse(rows, headers={"X-Next-Cursor": nxt} if nxt else None)
 
 @app.get("/admin/download/action_log.csv")
-def download_action_log():
-    return FileResponse("data/action_log.csv", media_type="text/csv", filename="action_log.csv")
+def download_action_log(
+    customer_id: Optional[str] = None,
+    action: Optional[str] = None,
+    region: Optional[str] = None,
+    passed: Optional[bool] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """
+    The action log as CSV, streamed from the audit store (same filters as
+    /admin/actions). Without a store the file itself is sent, or scanned once
+    when filters are given (file order instead of newest first).
+    """
+    since, until = _audit_range(since, until)
+    filters = dict(customer_id=customer_id, action=action, region=region,
+                   passed=passed, since=since, until=until)
+    if audit.store is not None:
+        body = audit.store.iter_csv(**filters)
+    elif any(v is not None for v in filters.values()):
+        body = audit.scan_csv(ensure_log(), **filters)
+    else:
+        return FileResponse(ensure_log(), media_type="text/csv", filename="action_log.csv")
+    return StreamingResponse(
+        body,
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="action_log.csv"'},
+    )
 
 @app.get("/admin/download/top_risk")
 def download_top_risk(
     region: Optional[str] = None,
-    format: str = "csv",        # csv | xlsx | json
+    format: str = "csv",        # csv | ndjson | xlsx | json | columnar | arrow
     limit: Optional[int] = None # None = no limit (all rows)
 ):
-    # --- build the dataset (same logic as /insights/top_risk but file-friendly) ---
-    df = load_signals()
-    wk = latest_week()
-    sub = df[df["date"] == wk]
-    if region:
-        sub = sub[sub["region"].astype(str) == region]
-
-    rows = []
-    for _, r in sub.iterrows():
-        cid, reg = str(r["customer_id"]), str(r["region"])
-        cpi = int(r["CPI"])
-        sev = severity_0_100(cid, reg)
-        crs = crs_0_1(cid)
-        score = final_risk(cpi, sev, crs)
-        plan = route_action(cpi, sev, crs)
-        rows.append({
-            "customer_id": cid, "region": reg,
-            "CPI": cpi, "Severity": sev, "CRS": crs,
-            "final_score": score, "action": plan["action"],
-            "reason": plan["reason"], "proposed_text": plan["proposed_text"],
-            "estimated_action_cost_usd": plan["estimated_action_cost_usd"]
-        })
+    from app.analytics import RISK_COLUMNS
+    from app.export import iter_csv, iter_ndjson, xlsx_bytes
+    from app.snapshot import get_snapshot
 
-    out = pd.DataFrame(rows).sort_values("final_score", ascending=False)
-    if limit is not None and limit > 0:
-        out = out.head(limit)
+    # --- slice the precomputed snapshot (same ranking as /insights/top_risk) ---
+    top = limit if limit is not None and limit > 0 else None
 
-    os.makedirs("data", exist_ok=True)
+    def ranked():
+        return get_snapshot().rows(region or None, top)
 
     # --- return in requested format ---
     fmt = format.lower()
-    if fmt == "json":
-        # return JSON array directly
-        return JSONResponse(out.to_dict(orient="records"))
+    if fmt in ("json", "columnar", "arrow"):
+        # whole result in one body (json = array of records)
+        return _table_response(ranked()[RISK_COLUMNS], fmt)
 
     if fmt == "xlsx" or fmt == "excel":
-        path = "data/top_risk_download.xlsx"
-        # index=False for a clean sheet
-        out.to_excel(path, index=False)
-        return FileResponse(
-            path,
+        return Response(
+            xlsx_bytes(ranked()[RISK_COLUMNS]),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename="top_risk.xlsx"
+            headers={"Content-Disposition": 'attachment; filename="top_risk.xlsx"'},
+        )
+
+    if fmt == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(ranked, RISK_COLUMNS),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="top_risk.ndjson"'},
         )
 
-    # default = CSV
-    path = "data/top_risk_download.csv"
-    out.to_csv(path, index=False)
-    return FileResponse(path, media_type="text/csv", filename="top_risk.csv")
+    # default = CSV, streamed in chunks (header goes out before the snapshot is ready)
+    return StreamingResponse(
+        iter_csv(ranked, RISK_COLUMNS),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="top_risk.csv"'},
+    )
 
 from fastapi.responses import HTMLResponse
-import pandas as pd, os
 
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard(request: Request):
-    log_path = "data/action_log.csv"
-    stats = {"logged": 0, "pass_rate": 0.0, "violations": 0}
-    trend = []
-    by_action = []
-
-    if os.path.exists(log_path):
-        df = pd.read_csv(log_path)
-        if not df.empty:
-            # coerce
-            df["ts"] = pd.to_datetime(df["ts"], errors="coerce")
-            if "pass" in df.columns:
-                # in CSV it might be string "True"/"False" → normalize to bool
-                df["pass"] = df["pass"].astype(str).str.lower().isin(["true","1","yes"])
-            df["date"] = df["ts"].dt.date
-
-            stats["logged"] = int(len(df))
-            stats["pass_rate"] = round(float(df["pass"].mean()*100) if len(df) else 0.0, 2)
-            stats["violations"] = int((~df["pass"]).sum())
-
-            trend = (
-                df.groupby("date")["pass"].mean().reset_index()
-                  .rename(columns={"pass":"pass_rate"})
-                  .assign(pass_rate=lambda x: (x["pass_rate"]*100).round(2))
-                  .tail(30)
-                  .to_dict(orient="records")
-            )
-            if "action" in df.columns:
-                by_action = (
-                    df.groupby("action").size().reset_index(name="count")
-                      .sort_values("count", ascending=False)
-                      .to_dict(orient="records")
-                )
-
+    # running aggregates; only log rows appended since the last view are read
+    stats, trend, by_action = action_log_stats.view(days=30)
     return templates.TemplateResponse(
         "dashboard.html",
         {"request": request, "stats": stats, "trend": trend, "by_action": by_action}
-    )
\ No newline at end of file
+    )
+
+warmup.state.imported(_IMPORT_T0, time.perf_counter() - _IMPORT_T0)
@@ -0,0 +1,330 @@
+# app/audit.py
+"""
+Indexed SQLite audit store over the action log.
+
+data/action_log.csv stays the durable, append-only source of truth; this is
+an embedded index of it (SQLite, WAL mode) so "approvals for customer X",
+"violations last week" or "tech_visit approvals in metro_north" are index
+range scans instead of a CSV scan:
+
+    actions(id, ts, customer_id, region, final_score, action, proposed_text,
+            pass, violations, missing_disclaimers)
+    indexes: (ts), (customer_id, ts), (action, ts), (pass, ts), (region, action, ts)
+
+Rows arrive in batches: every group commit of the CSV writer is inserted in
+one transaction (commit listener). The store also records the CSV byte offset
+it has indexed, in the same transaction, so rows are indexed exactly once even
+with several worker processes appending; anything it hasn't seen (other
+writers, hand edits, a fresh database) is tailed from that offset. Queries
+return newest first with keyset pagination on (ts, id), so any page is an
+index seek plus `limit` rows.
+"""
+import base64
+import csv
+import datetime as dt
+import io
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.logger import HEADER, LOG_PATH, TRUTHY, read_records, writer
+
+TAIL_CHUNK_BYTES = 8 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    customer_id TEXT NOT NULL,
+    region TEXT,
+    final_score,  -- no affinity: kept as logged, so 40 and 40.0 export as they were written
+    action TEXT,
+    proposed_text TEXT,
+    pass INTEGER NOT NULL,
+    violations TEXT,
+    missing_disclaimers TEXT
+);
+CREATE INDEX IF NOT EXISTS actions_ts ON actions(ts);
+CREATE INDEX IF NOT EXISTS actions_customer ON actions(customer_id, ts);
+CREATE INDEX IF NOT EXISTS actions_action ON actions(action, ts);
+CREATE INDEX IF NOT EXISTS actions_pass ON actions(pass, ts);
+CREATE INDEX IF NOT EXISTS actions_region_action ON actions(region, action, ts);
+CREATE TABLE IF NOT EXISTS source (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+_COLUMNS = "ts, customer_id, region, final_score, action, proposed_text, pass, violations, missing_disclaimers"
+_INSERT = f"INSERT INTO actions ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+def _num(v):
+    # CSV text → the int/float the writer logged ("40" → 40, "40.0" → 40.0)
+    if not isinstance(v, str):
+        return v
+    try:
+        return int(v)
+    except ValueError:
+        try:
+            return float(v)
+        except ValueError:
+            return v
+
+def _db_row(r: Sequence) -> Tuple:
+    # CSV / writer row (HEADER order) → actions columns; pass stored as 0/1
+    return (r[0], r[1], r[2], _num(r[3]), r[4], r[5], int(str(r[6]).lower() in TRUTHY), r[7], r[8])
+
+def _csv_row(r: Sequence) -> List:
+    # actions columns → HEADER order, pass rendered like the CSV writer does
+    return [r[0], r[1], r[2], r[3], r[4], r[5], bool(r[6]), r[7], r[8]]
+
+def normalize_ts(value: str) -> str:
+    """
+    An ISO date or timestamp as the log writes it (naive UTC, seconds), so it
+    compares correctly with the stored ts strings: "2025-10-01" →
+    "2025-10-01T00:00:00", "2025-10-01T02:00:00+02:00" / "...Z" → UTC.
+    Raises ValueError for anything else.
+    """
+    t = dt.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if t.tzinfo is not None:
+        t = t.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return t.isoformat(timespec="seconds")
+
+# ---------- cursors ----------
+def encode_cursor(ts: str, row_id: int) -> str:
+    raw = json.dumps({"t": ts, "i": row_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(ts, id) of the last row of the previous page; ValueError on anything malformed."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(data["t"]), int(data["i"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("malformed cursor") from e
+
+class AuditStore:
+    def __init__(self, db_path: str, source_path: str):
+        self.db_path = db_path
+        self.source_path = os.path.abspath(source_path)
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._offset = -1  # last indexed CSV offset this process knows of
+
+    # ---------- connections ----------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # the CSV is fsync'd; this is a rebuildable index
+        return conn
+
+    def _write_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+            self._writer = conn
+        return self._writer
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._write_lock:
+                self._write_conn()  # creates the schema on first use
+            conn = self._local.conn = self._connect()
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def close(self) -> None:
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        self._offset = -1
+
+    # ---------- ingest ----------
+    def _stored_offset(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT offset FROM source WHERE path = ?", (self.source_path,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_offset(self, conn: sqlite3.Connection, offset: int) -> None:
+        conn.execute("INSERT INTO source (path, offset) VALUES (?, ?) "
+                     "ON CONFLICT(path) DO UPDATE SET offset = excluded.offset", (self.source_path, offset))
+        self._offset = offset
+
+    def _tail(self, conn: sqlite3.Connection, offset: int) -> int:
+        """Index complete CSV records from `offset` (at most TAIL_CHUNK_BYTES); returns the new offset."""
+        try:
+            size = os.path.getsize(self.source_path)
+        except FileNotFoundError:
+            size = 0
+        if size < offset:  # truncated / rotated → rebuild from scratch
+            conn.execute("DELETE FROM actions")
+            offset = 0
+        if size == offset:
+            return offset
+        rows, end = read_records(self.source_path, offset, TAIL_CHUNK_BYTES)
+        conn.executemany(_INSERT, (_db_row(r) for r in rows if len(r) >= len(HEADER)))
+        return end
+
+    def sync(self) -> int:
+        """Index everything appended to the CSV since the stored offset; returns rows now held."""
+        self._sync()
+        with self._write_lock:
+            return self._write_conn().execute("SELECT count(*) FROM actions").fetchone()[0]
+
+    def _sync(self) -> None:
+        with self._write_lock:
+            conn = self._write_conn()
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    before = self._stored_offset(conn)
+                    after = self._tail(conn, before)
+                    self._set_offset(conn, after)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    self._offset = -1
+                    raise
+                if after == before:
+                    break
+
+    def on_commit(self, rows: List[List], start: int, end: int) -> None:
+        """Writer listener: one transaction per group commit; gaps are tailed from the CSV."""
+        with self._write_lock:
+            conn = self._write_conn()
+            conn.execute("BEGIN IMMEDIATE")  # serializes indexers across processes too
+            try:
+                offset = self._stored_offset(conn)
+                if offset == start and offset > 0:
+                    conn.executemany(_INSERT, [_db_row(r) for r in rows])
+                    offset = end
+                while offset < end:  # someone else appended in between (or first run)
+                    nxt = self._tail(conn, offset)
+                    if nxt == offset:
+                        break
+                    offset = nxt
+                self._set_offset(conn, offset)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._offset = -1
+                raise
+
+    def _catch_up(self) -> None:
+        # one stat per query; only tails when the CSV grew past what we indexed
+        try:
+            size = os.path.getsize(self.source_path)
+        except FileNotFoundError:
+            return
+        if size != self._offset:
+            self._sync()
+
+    # ---------- queries ----------
+    @staticmethod
+    def _where(customer_id=None, action=None, region=None, passed=None,
+               since=None, until=None) -> Tuple[str, List]:
+        clauses, args = [], []
+        for col, val in (("customer_id", customer_id), ("action", action), ("region", region)):
+            if val is not None:
+                clauses.append(f"{col} = ?")
+                args.append(val)
+        if passed is not None:
+            clauses.append("pass = ?")
+            args.append(int(passed))
+        if since is not None:
+            clauses.append("ts >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            args.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, limit: int = 100, cursor: Optional[str] = None, **filters) -> Tuple[List[Dict], Optional[str]]:
+        """
+        (rows newest first, cursor for the next page or None). Filters:
+        customer_id, action, region, passed (bool), since (inclusive) and
+        until (exclusive) as normalize_ts() strings. Raises ValueError for a
+        malformed cursor.
+        """
+        self._catch_up()
+        where, args = self._where(**filters)
+        if cursor:
+            ts, row_id = decode_cursor(cursor)
+            where += (" AND " if where else " WHERE ") + "(ts, id) < (?, ?)"
+            args += [ts, row_id]
+        limit = max(int(limit), 0)
+        sql = f"SELECT id, {_COLUMNS} FROM actions{where} ORDER BY ts DESC, id DESC LIMIT ?"
+        found = self._read_conn().execute(sql, args + [limit + 1]).fetchall()
+        more = len(found) > limit
+        found = found[:limit]
+        rows = [
+            dict(zip(["id"] + HEADER, (r[0], *_csv_row(r[1:]))))
+            for r in found
+        ]
+        nxt = encode_cursor(found[-1][1], found[-1][0]) if more and found else None
+        return rows, nxt
+
+    def iter_csv(self, chunk_rows: int = 5000, **filters) -> Iterator[bytes]:
+        """Matching rows as CSV (header first, newest first), streamed straight off one read snapshot."""
+        self._catch_up()
+        where, args = self._where(**filters)
+        buf = io.StringIO(newline="")
+        w = csv.writer(buf)
+        w.writerow(HEADER)
+        yield buf.getvalue().encode("utf-8")
+        # a dedicated connection: the generator may be resumed on different threads
+        conn = self._connect()
+        try:
+            cur = conn.execute(f"SELECT {_COLUMNS} FROM actions{where} ORDER BY ts DESC, id DESC", args)
+            while True:
+                batch = cur.fetchmany(chunk_rows)
+                if not batch:
+                    break
+                buf.seek(0)
+                buf.truncate()
+                w.writerows(_csv_row(r) for r in batch)
+                yield buf.getvalue().encode("utf-8")
+        finally:
+            conn.close()
+
+# ---------- without the index ----------
+def _matches(r: Sequence, customer_id=None, action=None, region=None, passed=None,
+             since=None, until=None) -> bool:
+    # the same filters as AuditStore._where, on a CSV record (HEADER order)
+    return (len(r) >= len(HEADER)
+            and (customer_id is None or r[1] == customer_id)
+            and (region is None or r[2] == region)
+            and (action is None or r[4] == action)
+            and (passed is None or (str(r[6]).lower() in TRUTHY) == passed)
+            and (since is None or r[0] >= since)
+            and (until is None or r[0] < until))
+
+def scan_csv(path: str, **filters) -> Iterator[bytes]:
+    """
+    iter_csv's output without an audit store: one streaming pass over the CSV
+    (TAIL_CHUNK_BYTES at a time), matching rows in file order, oldest first.
+    """
+    buf = io.StringIO(newline="")
+    w = csv.writer(buf)
+    w.writerow(HEADER)
+    yield buf.getvalue().encode("utf-8")
+    offset = 0
+    while True:
+        rows, end = read_records(path, offset, TAIL_CHUNK_BYTES)
+        if end == offset:
+            return
+        offset = end
+        buf.seek(0)
+        buf.truncate()
+        w.writerows(r for r in rows if _matches(r, **filters))
+        yield buf.getvalue().encode("utf-8")
+
+store: Optional[AuditStore] = None
+if settings.ACTION_LOG_DB:
+    store = AuditStore(settings.ACTION_LOG_DB, LOG_PATH)
+    writer.add_listener(store.on_commit)
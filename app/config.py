@@ -5,6 +5,30 @@ class Settings(BaseSettings):
     APP_VERSION: str = "0.1.0"
     ENV: str = "dev"
     LOG_LEVEL: str = "INFO"
+    # seconds between signals-file change checks (0 = never hot reload)
+    SIGNALS_RELOAD_INTERVAL_S: float = 5.0
+    # binary columnar cache of the normalized signals ("" = always parse the CSV)
+    SIGNALS_CACHE_DIR: str = "data/.signals_cache"
+    # opt-in multi-core scoring: worker processes (0 = score in-process) and the
+    # population size below which sharding isn't worth the IPC
+    SCORING_WORKERS: int = 0
+    SCORING_PARALLEL_MIN_ROWS: int = 50000
+    # risk snapshots kept per dataset version (older ones keep serving open cursors)
+    SNAPSHOT_KEEP_VERSIONS: int = 2
+    # action-log group commit: max rows per commit, linger for stragglers, "batch" | "never" fsync
+    ACTION_LOG_BATCH_ROWS: int = 1000
+    ACTION_LOG_MAX_WAIT_MS: float = 2.0
+    ACTION_LOG_FSYNC: str = "batch"
+    # SQLite (WAL) index over the action log behind /admin/actions ("" = CSV only)
+    ACTION_LOG_DB: str = "data/action_log.db"
+    # per-stage latency histograms at /metrics; Server-Timing header on every response
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING: bool = False
+    # week-partitioned signal history behind /cpi/movers, and how many weeks stay mapped
+    HISTORY_DIR: str = "data/history"
+    HISTORY_CACHE_WEEKS: int = 4
+    # startup warm-up (data load + risk snapshot): "background" | "blocking" | "off"
+    WARMUP: str = "background"
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
@@ -1,8 +1,23 @@
-from functools import lru_cache
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import shutil
+import threading
+import time
+import numpy as np
 import pandas as pd
 import os
 
+from app import rollup, score_table, signals_cache
+from app.analytics import cpi_batch
+from app.config import settings
+from app.metrics import stage, timed
+
+log = logging.getLogger(__name__)
+
 SIGNALS_PATH = "data/customers.csv"
+# documented memory budget for the in-memory signals frame (see memory_footprint)
+MEMORY_TARGET_MB_PER_M_ROWS = 32
 
 def _normalize(df):
     df.columns = [c.strip().lower() for c in df.columns]
@@ -32,34 +47,270 @@ def _compute_cpi_if_missing(df):
     if "cpi" not in df.columns:
         req = ["contract_days_remaining","price_sensitivity_flag","peer_port_count_30d","weekly_ad_intensity_index"]
         if all(c in df.columns for c in req):
-            def score(r):
-                days = int(r["contract_days_remaining"])
-                price = 1 if bool(r["price_sensitivity_flag"]) else 0
-                peer  = int(r["peer_port_count_30d"])
-                ad    = float(r["weekly_ad_intensity_index"])
-                days_term = max(0, 100 - min(days, 100))
-                price_term = 100 if price == 1 else 0
-                peer_term = min(peer * 10, 100)
-                ad_term = int(round(min(ad * 10, 100)))
-                return int(round(0.35*days_term + 0.25*price_term + 0.25*peer_term + 0.15*ad_term))
-            df["cpi"] = df.apply(score, axis=1)
+            df["cpi"] = cpi_batch(*(df[c].to_numpy() for c in req))
         else:
             df["cpi"] = 0
     df = df.rename(columns={"cpi":"CPI"})
     return df
 
-@lru_cache(maxsize=1)
-def load_signals() -> pd.DataFrame:
-    if not os.path.exists(SIGNALS_PATH):
-        raise FileNotFoundError(f"Signals file not found: {SIGNALS_PATH}")
-    df = pd.read_csv(SIGNALS_PATH)
+def _compact(df):
+    """
+    Shrink the frame without changing any value it hands out:
+      - customer_id and other repeated text → categorical codes + lookup table
+      - integers → the smallest signed int that holds the column's range
+      - floats → float32 only when every value round-trips exactly (else kept)
+      - booleans stay 1-byte bool
+    """
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object:
+            # a code per row only pays off once values repeat (weekly history)
+            if s.nunique(dropna=False) * 2 <= len(s):
+                df[c] = s.astype("category")
+        elif s.dtype.kind in "iu":
+            df[c] = pd.to_numeric(s, downcast="signed" if s.dtype.kind == "i" else "unsigned")
+        elif s.dtype == np.float64:
+            f32 = s.to_numpy().astype(np.float32)
+            if np.array_equal(f32.astype(np.float64), s.to_numpy(), equal_nan=True):
+                df[c] = f32
+    return df
+
+def memory_footprint(frame: pd.DataFrame) -> Dict:
+    """Bytes held by the frame (categories and strings included) vs. the per-million-rows target."""
+    per_col = frame.memory_usage(index=False, deep=True)
+    total, rows = int(per_col.sum()), len(frame)
+    per_m = total / rows * 1e6 / 2**20 if rows else 0.0
+    return {
+        "rows": rows,
+        "bytes": total,
+        "bytes_per_row": round(total / rows, 2) if rows else 0.0,
+        "mb_per_million_rows": round(per_m, 2),
+        "target_mb_per_million_rows": MEMORY_TARGET_MB_PER_M_ROWS,
+        "within_target": per_m <= MEMORY_TARGET_MB_PER_M_ROWS,
+        "columns": {c: {"dtype": str(frame[c].dtype), "bytes": int(b)} for c, b in per_col.items()},
+    }
+
+def dataset_version(path: str = None) -> str:
+    """Cheap version tag of the signals file (mtime + size); changes when the file does."""
+    path = path or SIGNALS_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Signals file not found: {path}")
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+@dataclass(frozen=True)
+class Signals:
+    version: str  # dataset_version() of the file this was read from
+    frame: pd.DataFrame
+    # (date, region) → ascending row positions into `frame`
+    partitions: Dict[Tuple[pd.Timestamp, str], np.ndarray]
+    # customer_id → row position of its (first) latest-week row
+    latest_rows: Dict[object, int]
+    # per-(date, region) CPI count/sum/histogram; None if CPI isn't 0..100 ints
+    cpi_rollup: Optional[rollup.CpiRollup] = None
+    # per-(customer, region) Severity/CRS, memory-mapped and shared across workers
+    scores: Optional[score_table.ScoreTable] = None
+
+def _build_partitions(df) -> Dict[Tuple[pd.Timestamp, str], np.ndarray]:
+    groups = df.groupby(["date", "region"], observed=True, sort=False, dropna=False).indices
+    return {(pd.Timestamp(d), str(r)): pos for (d, r), pos in groups.items()}
+
+def _build_latest_rows(df, partitions) -> Dict[object, int]:
+    wk = max((d for d, _ in partitions), default=None)
+    picked = [pos for (d, _), pos in partitions.items() if d == wk]
+    if not picked:
+        return {}
+    pos = np.sort(np.concatenate(picked))
+    ids = df["customer_id"].to_numpy()[pos]
+    # reversed so the first row per customer wins, like df[mask].iloc[0]
+    return dict(zip(ids[::-1].tolist(), pos[::-1].tolist()))
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw signals rows → lower-case columns, parsed dates, typed flags, CPI."""
     df = _normalize(df)
     df = _ensure_date(df)
     df = _ensure_types(df)
-    df = _compute_cpi_if_missing(df)
+    return _compute_cpi_if_missing(df)
+
+def _parse_csv(path: str) -> pd.DataFrame:
+    df = normalize_frame(pd.read_csv(path))
     df["region"] = df["region"].astype("category")
-    return df
+    return _compact(df)
+
+@timed("signals.load")
+def _read_signals(path: str) -> Signals:
+    version = dataset_version(path)
+    cached = signals_cache.load(path, version)
+    if cached is not None:
+        return _signals(version, *cached, cache_dir=signals_cache.cache_dir(path, version))
+
+    df = _parse_csv(path)
+    if dataset_version(path) != version:
+        # file was rewritten while we parsed it; don't publish a torn read
+        raise RuntimeError(f"Signals file changed during load: {path}")
+    partitions = _build_partitions(df)
+    cache_dir = None
+    try:
+        cache_dir = signals_cache.save(path, version, df, partitions)
+    except OSError:
+        log.warning("could not write signals cache for %s", path, exc_info=True)
+    return _signals(version, df, partitions, cache_dir=cache_dir)
+
+def _signals(version: str, frame: pd.DataFrame, partitions, cache_dir: Optional[str] = None) -> Signals:
+    mem = memory_footprint(frame)
+    log.info("signals %s: %d rows, %.1f MB (%.1f MB per million rows, target %d)",
+             version, mem["rows"], mem["bytes"] / 2**20, mem["mb_per_million_rows"],
+             MEMORY_TARGET_MB_PER_M_ROWS)
+    return Signals(version=version, frame=frame, partitions=partitions,
+                   latest_rows=_build_latest_rows(frame, partitions),
+                   cpi_rollup=rollup.build(frame, partitions),
+                   scores=score_table.attach(cache_dir, frame))
+
+def build_signals_cache(path: Optional[str] = None, force: bool = False) -> Optional[str]:
+    """Parse + normalize `path` once and write its binary cache + score table; returns the cache dir."""
+    path = path or SIGNALS_PATH
+    version = dataset_version(path)
+    target = signals_cache.cache_dir(path, version)
+    if target is None:
+        return None
+    if force and os.path.isdir(target):
+        shutil.rmtree(target)
+    if os.path.isdir(target):
+        cached = signals_cache.load(path, version)
+        if cached is not None:
+            score_table.attach(target, cached[0])
+        return target
+    df = _parse_csv(path)
+    target = signals_cache.save(path, version, df, _build_partitions(df))
+    score_table.attach(target, df)
+    return target
+
+# ---------- hot-reloading data manager ----------
+class SignalsManager:
+    """
+    Owns the live Signals object.
+      - cold start: concurrent callers share one load (single-flight)
+      - afterwards: at most every `check_interval` seconds the file is stat-ed;
+        a change triggers a background rebuild and an atomic swap, so requests
+        keep whatever version they already grabbed and never wait on a reload
+    Warmers run on the new Signals before it is published (e.g. risk snapshot).
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._current: Optional[Signals] = None
+        self._load_lock = threading.Lock()
+        self._reloading = threading.Lock()
+        self._last_check = 0.0
+        self._warmers: List[Callable[[Signals], None]] = []
+
+    def add_warmer(self, fn: Callable[[Signals], None]) -> None:
+        self._warmers.append(fn)
+
+    def get(self) -> Signals:
+        cur = self._current
+        if cur is None:
+            return self._cold_load()
+        if self.check_interval > 0 and time.monotonic() - self._last_check >= self.check_interval:
+            self._last_check = time.monotonic()
+            if self._changed(cur):
+                self.refresh(wait=False)
+        return cur
+
+    def refresh(self, wait: bool = True) -> bool:
+        """Rebuild from disk and swap in. Returns False if a reload is already running."""
+        if not self._reloading.acquire(blocking=False):
+            return False
+        if wait:
+            self._reload()
+        else:
+            threading.Thread(target=self._reload, name="signals-reload", daemon=True).start()
+        return True
+
+    def clear(self) -> None:
+        """Drop the live Signals; the next get() cold-loads."""
+        with self._load_lock:
+            self._current = None
+
+    def _cold_load(self) -> Signals:
+        with self._load_lock:
+            if self._current is None:
+                if not os.path.exists(SIGNALS_PATH):
+                    raise FileNotFoundError(f"Signals file not found: {SIGNALS_PATH}")
+                self._current = self._prepare(_read_signals(SIGNALS_PATH))
+                self._last_check = time.monotonic()
+            return self._current
+
+    def _changed(self, cur: Signals) -> bool:
+        try:
+            return dataset_version() != cur.version
+        except FileNotFoundError:
+            return False  # keep serving the last good version
+
+    def _prepare(self, sig: Signals) -> Signals:
+        for warm in self._warmers:
+            warm(sig)
+        return sig
+
+    def _reload(self) -> None:
+        try:
+            sig = self._prepare(_read_signals(SIGNALS_PATH))
+            with self._load_lock:
+                self._current = sig  # atomic publish
+        except Exception:
+            log.exception("signals reload failed; keeping version %s",
+                          self._current.version if self._current else None)
+        finally:
+            self._reloading.release()
+
+manager = SignalsManager(check_interval=settings.SIGNALS_RELOAD_INTERVAL_S)
+
+def current_signals() -> Signals:
+    """The live Signals; grab it once per request to stay on one version."""
+    return manager.get()
+
+def clear_cache() -> None:
+    """Forget the loaded frame and its index; the next access re-reads the file."""
+    manager.clear()
+
+def load_signals() -> pd.DataFrame:
+    return current_signals().frame
+
+def signals_slice(
+    week: Optional[pd.Timestamp] = None,
+    region: Optional[str] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    sig: Optional[Signals] = None,
+) -> pd.DataFrame:
+    """
+    Rows matching an exact week and/or region and/or [start, end] window,
+    in original file order. Only the matching partitions are touched.
+    """
+    sig = sig or current_signals()
+    with stage("signals.slice"):
+        return _slice(sig, week, region, start, end)
+
+def _slice(sig: Signals, week, region, start, end) -> pd.DataFrame:
+    picked = [
+        pos for (d, r), pos in sig.partitions.items()
+        if (week is None or d == week)
+        and (region is None or r == region)
+        and (start is None or d >= start)
+        and (end is None or d <= end)
+    ]
+    if not picked:
+        return sig.frame.iloc[0:0]
+    pos = picked[0] if len(picked) == 1 else np.sort(np.concatenate(picked))
+    return sig.frame.take(pos)
+
+def customer_row(customer_id, sig: Optional[Signals] = None) -> Optional[pd.Series]:
+    """Latest-week row for one customer via the hash index (None if absent)."""
+    sig = sig or current_signals()
+    with stage("signals.lookup"):
+        pos = sig.latest_rows.get(customer_id)
+        return None if pos is None else sig.frame.iloc[pos]
 
-def latest_week():
-    df = load_signals()
-    return df["date"].max()
+def latest_week(sig: Optional[Signals] = None):
+    sig = sig or current_signals()
+    return max((d for d, _ in sig.partitions), default=pd.NaT)
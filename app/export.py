@@ -0,0 +1,197 @@
+# app/export.py
+"""
+Chunked, streaming encoders for large tabular downloads.
+
+Each encoder yields bytes a few thousand rows at a time straight from the
+(already ranked) frame: no temp files, memory bounded by one chunk. The frame
+is produced lazily so the first bytes go out before it is ready.
+
+Bulk consumers can also ask for whole-result columnar payloads: column
+arrays with repeated strings dictionary-encoded (JSON) or an Arrow IPC
+stream (needs the optional `pyarrow`).
+
+For bulk uploads, `JsonRecordStream` decodes an NDJSON or JSON-array request
+body incrementally, record by record.
+"""
+import codecs
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+CHUNK_ROWS = 5000
+
+def _chunks(frame: pd.DataFrame, rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    rows = rows or CHUNK_ROWS
+    for i in range(0, len(frame), rows):
+        yield frame.iloc[i:i + rows]
+
+def iter_csv(get_frame: Callable[[], pd.DataFrame], columns: List[str]) -> Iterator[bytes]:
+    """CSV bytes identical to frame.to_csv(index=False); header is sent before get_frame runs."""
+    yield pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8")
+    for chunk in _chunks(get_frame()[columns]):
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+def iter_ndjson(get_frame: Callable[[], pd.DataFrame], columns: List[str]) -> Iterator[bytes]:
+    """One JSON object per line, same values as to_dict(orient="records")."""
+    for chunk in _chunks(get_frame()[columns]):
+        yield b"".join(orjson.dumps(rec) + b"\n" for rec in chunk.to_dict(orient="records"))
+
+def xlsx_bytes(frame: pd.DataFrame) -> bytes:
+    """Whole workbook in memory (xlsx can't be streamed); no shared temp path."""
+    buf = io.BytesIO()
+    frame.to_excel(buf, index=False)
+    return buf.getvalue()
+
+# ---------- columnar ----------
+def _dictionary(values: np.ndarray) -> Optional[Dict]:
+    """{"dictionary": [...], "codes": [...]} when values repeat enough to be worth it."""
+    try:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        uniques = list(uniques)
+    except TypeError:  # unhashable cells (e.g. compliance dicts): key on their JSON
+        codes, _ = pd.factorize(np.array([orjson.dumps(v) for v in values], dtype=object))
+        first = np.unique(codes, return_index=True)[1]
+        uniques = [values[i] for i in first]
+    if len(uniques) * 2 > len(values):
+        return None
+    return {"dictionary": uniques, "codes": codes.tolist()}
+
+def columnar(frame: pd.DataFrame) -> Dict:
+    """
+    {"rows": n, "columns": {name: [values] | {"dictionary": [...], "codes": [...]}}}.
+    String/object columns whose distinct values are at most half the rows are
+    dictionary-encoded: value i is dictionary[codes[i]].
+    """
+    cols = {}
+    for name in frame.columns:
+        s = frame[name]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # the frame's categories span the whole dataset, not this result:
+            # encode the values like any object column (only what is sent)
+            s = s.astype(object)
+        if s.dtype.kind == "M":
+            s = s.dt.strftime("%Y-%m-%d")
+        values = s.to_numpy()
+        if values.dtype == object:
+            enc = _dictionary(values)
+            if enc is not None:
+                cols[name] = enc
+                continue
+        cols[name] = values.tolist()
+    return {"rows": int(len(frame)), "columns": cols}
+
+def arrow_ipc_bytes(frame: pd.DataFrame) -> bytes:
+    """Arrow IPC stream of `frame` with dictionary-encoded strings; ImportError without pyarrow."""
+    import pyarrow as pa  # optional dependency, only needed for format=arrow
+
+    cats = [c for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)]
+    if cats:  # dictionaries hold only the values this result uses
+        frame = frame.assign(**{c: frame[c].cat.remove_unused_categories() for c in cats})
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+# ---------- streaming input ----------
+class JsonRecordError:
+    """A record that could not be decoded (NDJSON keeps going after one)."""
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+class JsonRecordStream:
+    """
+    Incremental decoder for a body holding NDJSON (one value per line) or one
+    JSON array; the format is picked from the first non-blank character.
+    feed() returns the records completed so far, so memory is bounded by the
+    largest record rather than the body. A bad NDJSON line comes back as a
+    JsonRecordError in its place; a malformed array raises ValueError.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._mode: Optional[str] = None      # "ndjson" | "array"
+        self._state = "first"                 # array: first | value | sep | done
+        self._json = json.JSONDecoder()
+
+    def feed(self, data: bytes) -> List:
+        self._buf += self._utf8.decode(data)
+        return self._drain(final=False)
+
+    def finish(self) -> List:
+        self._buf += self._utf8.decode(b"", final=True)
+        out = self._drain(final=True)
+        if self._mode == "array" and self._state != "done":
+            raise ValueError("JSON array is not closed")
+        return out
+
+    def _drain(self, final: bool) -> List:
+        if self._mode is None:
+            head = self._buf.lstrip()
+            if not head:
+                return []
+            self._mode = "array" if head[0] == "[" else "ndjson"
+            if self._mode == "array":
+                self._buf = head[1:]
+        return self._ndjson(final) if self._mode == "ndjson" else self._array(final)
+
+    def _ndjson(self, final: bool) -> List:
+        lines = self._buf.split("\n")
+        self._buf = "" if final else lines.pop()
+        out = []
+        for line in lines:
+            if line.strip():
+                try:
+                    out.append(orjson.loads(line))
+                except orjson.JSONDecodeError as e:
+                    out.append(JsonRecordError(f"invalid JSON: {e}"))
+        return out
+
+    def _array(self, final: bool) -> List:
+        buf, i, n, out = self._buf, 0, len(self._buf), []
+        while True:
+            while i < n and buf[i] in " \t\r\n":
+                i += 1
+            if i >= n:
+                break
+            if self._state == "done":
+                raise ValueError("unexpected data after the JSON array")
+            if self._state in ("first", "sep") and buf[i] == "]":
+                self._state, i = "done", i + 1
+                continue
+            if self._state == "sep":
+                if buf[i] != ",":
+                    raise ValueError(f"expected ',' or ']' in JSON array, got {buf[i]!r}")
+                self._state, i = "value", i + 1
+                continue
+            try:
+                obj, j = self._json.raw_decode(buf, i)
+            except json.JSONDecodeError as e:
+                if final:
+                    raise ValueError(f"invalid JSON array element: {e}") from None
+                break  # element still incomplete → wait for more bytes
+            if j >= n and not final:
+                break  # a bare number/literal may continue in the next chunk
+            out.append(obj)
+            self._state, i = "sep", j
+        self._buf = buf[i:]
+        return out
+
+def iter_json_records(chunks: Iterable[bytes]) -> Iterator:
+    """Records from an NDJSON / JSON-array byte stream (e.g. a file read in blocks)."""
+    stream = JsonRecordStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.finish()
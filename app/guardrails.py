@@ -1,6 +1,9 @@
 # app/guardrails.py
 import re
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from app.metrics import timed
 
 # 1) Banned phrases (case-insensitive, whole or partial)
 BANNED_PATTERNS: List[re.Pattern] = [
@@ -19,22 +22,53 @@ REQUIRED_SNIPPETS = [
     "one-time credit, subject to account review",
 ]
 
-def check_message(text: str) -> Dict:
-    """Returns {pass: bool, violations: [...], missing_disclaimers: [...]}"""
-    violations = []
-    for pat in BANNED_PATTERNS:
-        if pat.search(text or ""):
-            violations.append(pat.pattern)
+# One alternation over every banned pattern: clean text (the common case) is
+# cleared with a single scan. Only texts that hit something are re-checked
+# pattern by pattern, so the violations list stays exactly as before.
+_BANNED_SCANNER = re.compile("|".join(f"(?:{p.pattern})" for p in BANNED_PATTERNS), re.I)
+
+# proposed texts are mostly the same few templates → memoize per distinct text
+VERDICT_CACHE_SIZE = 4096
 
-    missing = []
-    low = (text or "").lower()
-    for req in REQUIRED_SNIPPETS:
-        if req not in low:
-            missing.append(req)
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def _verdict(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    violations: Tuple[str, ...] = ()
+    if _BANNED_SCANNER.search(text):
+        violations = tuple(pat.pattern for pat in BANNED_PATTERNS if pat.search(text))
+    low = text.lower()
+    missing = tuple(req for req in REQUIRED_SNIPPETS if req not in low)
+    return violations, missing
 
+@timed("compliance.check")
+def check_message(text: str) -> Dict:
+    """Returns {pass: bool, violations: [...], missing_disclaimers: [...]}"""
+    violations, missing = _verdict(text or "")
     is_ok = (len(violations) == 0 and len(missing) == 0)
-    return {"pass": is_ok, "violations": violations, "missing_disclaimers": missing}
+    # fresh lists per call so callers can't mutate the cached verdict
+    return {"pass": is_ok, "violations": list(violations), "missing_disclaimers": list(missing)}
+
+@timed("compliance.check_batch")
+def check_messages(texts: Iterable[str], auto_fix: bool = False) -> List[Dict]:
+    """
+    Batch check_message (optionally after add_disclaimers), same results as
+    calling it per text; each distinct text is scanned once.
+    """
+    texts = list(texts)
+    seen: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+    for t in texts:
+        if t not in seen:
+            seen[t] = _verdict((add_disclaimers(t) if auto_fix else t) or "")
+    out = []
+    for t in texts:
+        violations, missing = seen[t]
+        out.append({
+            "pass": not violations and not missing,
+            "violations": list(violations),
+            "missing_disclaimers": list(missing),
+        })
+    return out
 
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
 def add_disclaimers(text: str) -> str:
     """Append any missing required disclaimers neatly."""
     low = text.lower()
@@ -0,0 +1,246 @@
+# app/history.py
+"""
+Week-partitioned signal history with precomputed week-over-week deltas.
+
+Each ingested week is one directory of .npy columns, sorted by customer_id:
+
+    <HISTORY_DIR>/<YYYY-MM-DD>/
+        meta.json
+        customer_id.npy  region.npy           fixed-width unicode
+        CPI.npy          final_score.npy      this week
+        prev_CPI.npy     prev_final_score.npy same customer, previous stored week
+                                              (-1 / NaN when it had no row there)
+        cpi_delta.npy    risk_delta.npy       this week minus previous week
+
+Ingesting a week scores it, joins it against the previous stored week only
+(searchsorted on the sorted ids) and writes its directory atomically; if a
+later week already exists, just that next week's prev/delta columns are
+relinked. Nothing else in the year is read. Queries memory-map only the weeks
+they touch (a small LRU), so "who jumped since last week" is a top-K over one
+precomputed delta column.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import top_k_indices
+from app.config import settings
+from app.dataio import normalize_frame
+from app.parallel import score_frame_parallel
+
+FORMAT_VERSION = 2  # 2: md5 region bias (final_score changed), rounded risk_delta
+COLUMNS = ["customer_id", "region", "CPI", "final_score",
+           "prev_CPI", "prev_final_score", "cpi_delta", "risk_delta"]
+NO_PREV_CPI = -1
+
+class Week:
+    """One loaded week partition: column name → read-only array, sorted by customer_id."""
+
+    def __init__(self, day: str, columns: Dict[str, np.ndarray], prev_week: Optional[str]):
+        self.day = day
+        self.columns = columns
+        self.prev_week = prev_week
+
+    def __len__(self) -> int:
+        return len(self.columns["customer_id"])
+
+def _link(cur: Dict[str, np.ndarray], prev: Optional[Week]) -> Dict[str, np.ndarray]:
+    """Fill cur's prev_* / *_delta columns from `prev` (None = no earlier week)."""
+    n = len(cur["customer_id"])
+    prev_cpi = np.full(n, NO_PREV_CPI, dtype=np.int16)
+    prev_score = np.full(n, np.nan)
+    if prev is not None and len(prev):
+        ids = prev.columns["customer_id"]
+        pos = np.searchsorted(ids, cur["customer_id"])
+        pos_ok = np.minimum(pos, len(ids) - 1)
+        hit = (pos < len(ids)) & (ids[pos_ok] == cur["customer_id"])
+        prev_cpi[hit] = prev.columns["CPI"][pos_ok[hit]]
+        prev_score[hit] = prev.columns["final_score"][pos_ok[hit]]
+    has_prev = prev_cpi != NO_PREV_CPI
+    cur["prev_CPI"] = prev_cpi
+    cur["prev_final_score"] = prev_score
+    cur["cpi_delta"] = np.where(has_prev, cur["CPI"].astype(np.int16) - prev_cpi, 0).astype(np.int16)
+    # 2 decimals like final_risk: 40.3 - 40.1 is 0.2, not 0.19999999999999574 (NaN without a previous row)
+    cur["risk_delta"] = np.round(cur["final_score"] - prev_score, 2)
+    return cur
+
+def _read_meta(path: str) -> Optional[Dict]:
+    """A week directory's meta.json, or None if it's missing or from another FORMAT_VERSION."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    return meta if meta.get("format") == FORMAT_VERSION else None
+
+class HistoryStore:
+    def __init__(self, root: str, cache_weeks: int = 4):
+        self.root = root
+        self.cache_weeks = cache_weeks
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, Week]" = OrderedDict()
+        self._weeks: List[str] = []
+        self._listed_mtime: Optional[int] = None
+
+    # ---------- index ----------
+    def weeks(self) -> List[str]:
+        """
+        Stored weeks (ISO dates), ascending; re-listed only when the directory
+        changes. Weeks written under another FORMAT_VERSION aren't listed, so
+        ingest_frame writes them again.
+        """
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime != self._listed_mtime:
+            with self._lock:
+                days = sorted(d for d in os.listdir(self.root)
+                              if not d.startswith(".") and _read_meta(os.path.join(self.root, d)) is not None)
+                # weeks may have been rewritten by another process (ingest script)
+                self._loaded.clear()
+                self._weeks, self._listed_mtime = days, mtime
+        return self._weeks
+
+    def week(self, day: str) -> Optional[Week]:
+        """Week partition for `day` (memory-mapped on first use), or None if not stored (in this format)."""
+        with self._lock:
+            wk = self._loaded.get(day)
+            if wk is not None:
+                self._loaded.move_to_end(day)
+                return wk
+        path = os.path.join(self.root, day)
+        meta = _read_meta(path)
+        if meta is None:
+            return None
+        cols = {c: np.asarray(np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r")) for c in COLUMNS}
+        wk = Week(day, cols, meta.get("prev_week"))
+        with self._lock:
+            self._loaded[day] = wk
+            while len(self._loaded) > max(self.cache_weeks, 1):
+                self._loaded.popitem(last=False)
+        return wk
+
+    def _neighbours(self, day: str):
+        days = self.weeks()
+        i = int(np.searchsorted(days, day))
+        prev_day = days[i - 1] if i > 0 else None
+        j = i + 1 if i < len(days) and days[i] == day else i
+        next_day = days[j] if j < len(days) else None
+        return prev_day, next_day
+
+    # ---------- ingest ----------
+    def _write(self, day: str, cols: Dict[str, np.ndarray], prev_week: Optional[str]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            for c in COLUMNS:
+                np.save(os.path.join(tmp, f"{c}.npy"), cols[c])
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"format": FORMAT_VERSION, "week": day, "rows": int(len(cols["customer_id"])),
+                           "prev_week": prev_week}, f)
+            final = os.path.join(self.root, day)
+            if os.path.isdir(final):  # re-ingest: swap the old partition out first
+                old = tempfile.mkdtemp(prefix=".old-", dir=self.root)
+                os.replace(final, os.path.join(old, day))
+                os.replace(tmp, final)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(tmp, final)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        with self._lock:
+            self._loaded.pop(day, None)
+            self._listed_mtime = None
+
+    def ingest_week(self, rows: pd.DataFrame) -> str:
+        """
+        Store one week of normalized signals rows (single `date`): score it,
+        link it to the previous stored week and, if a later week exists,
+        relink that one to this week. Returns the week's ISO date.
+        """
+        days = pd.to_datetime(rows["date"]).dt.normalize().unique()
+        if len(days) != 1:
+            raise ValueError(f"ingest_week needs exactly one week of rows, got {len(days)}")
+        day = str(pd.Timestamp(days[0]).date())
+
+        rows = rows.drop_duplicates("customer_id", keep="first")  # same row customer_row() serves
+        scored = score_frame_parallel(rows[["customer_id", "region", "CPI"]])
+        order = np.argsort(scored["customer_id"].to_numpy().astype(str), kind="stable")
+        cols = {
+            "customer_id": scored["customer_id"].to_numpy().astype(str)[order],
+            "region": scored["region"].to_numpy().astype(str)[order],
+            "CPI": scored["CPI"].to_numpy().astype(np.int16)[order],
+            "final_score": scored["final_score"].to_numpy().astype(np.float64)[order],
+        }
+        prev_day, next_day = self._neighbours(day)
+        self._write(day, _link(cols, self.week(prev_day) if prev_day else None), prev_day)
+
+        if next_day is not None:  # out-of-order / re-ingested week: the next week's deltas moved
+            nxt = self.week(next_day)
+            ncols = {c: np.array(nxt.columns[c]) for c in ("customer_id", "region", "CPI", "final_score")}
+            self._write(next_day, _link(ncols, self.week(day)), day)
+        return day
+
+    def ingest_frame(self, df: pd.DataFrame, skip_existing: bool = True) -> List[str]:
+        """Ingest every week in a normalized frame, oldest first; returns the weeks written."""
+        existing = set(self.weeks()) if skip_existing else set()
+        written = []
+        for day, rows in df.groupby(df["date"].dt.normalize(), sort=True):
+            if str(pd.Timestamp(day).date()) in existing:
+                continue
+            written.append(self.ingest_week(rows))
+        return written
+
+    def ingest_csv(self, path: str, skip_existing: bool = True) -> List[str]:
+        """Bootstrap / append from a signals CSV (e.g. competitive_signals_2025.csv)."""
+        return self.ingest_frame(normalize_frame(pd.read_csv(path)), skip_existing=skip_existing)
+
+    # ---------- queries ----------
+    def movers(self, limit: int = 20, region: Optional[str] = None, week: Optional[str] = None,
+               by: str = "cpi") -> Optional[Dict]:
+        """
+        Biggest week-over-week increases (by="cpi" or "risk") in `week`
+        (default: latest stored) vs. the previous stored week. None if the
+        week isn't stored.
+        """
+        days = self.weeks()
+        day = week or (days[-1] if days else None)
+        wk = self.week(day) if day else None
+        if wk is None:
+            return None
+        c = wk.columns
+        delta = c["cpi_delta"] if by == "cpi" else c["risk_delta"]
+        mask = c["prev_CPI"] != NO_PREV_CPI
+        if region is not None:
+            mask &= c["region"] == region
+        cand = np.flatnonzero(mask & (delta > 0))
+        pos = cand[top_k_indices(delta[cand], limit)]  # ties: customer_id ascending
+        return {
+            "week": wk.day,
+            "prev_week": wk.prev_week,
+            "by": by,
+            "movers": [
+                {
+                    "customer_id": str(c["customer_id"][i]),
+                    "region": str(c["region"][i]),
+                    "CPI": int(c["CPI"][i]),
+                    "prev_CPI": int(c["prev_CPI"][i]),
+                    "cpi_delta": int(c["cpi_delta"][i]),
+                    "final_score": float(c["final_score"][i]),
+                    "prev_final_score": float(c["prev_final_score"][i]),
+                    "risk_delta": float(c["risk_delta"][i]),
+                }
+                for i in pos
+            ],
+        }
+
+store = HistoryStore(settings.HISTORY_DIR, cache_weeks=settings.HISTORY_CACHE_WEEKS)
@@ -1,36 +1,71 @@
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Tuple
 from app.schemas import StubResult, ProposedAction
 
-def run_stub_flow(ticket: Dict) -> StubResult:
-    """
-    Extremely small, deterministic stand-in for your agent graph.
-    Replace later with real LangGraph nodes and tools.
-    """
-    text = (ticket.get("text") or "").lower()
+CUSTOMER_MESSAGE = (
+    "We noticed a recent billing change and possible line/speed issues. "
+    "We can review your plan and check your line. Would you like us to schedule a callback?"
+)
+ACTION_TYPE = "plan_review"
+ACTION_REASON = "Billing change + speed concerns"
+
+def _factors(text: str) -> Tuple[bool, bool]:
+    """(billing, speed) keyword hits in an already lower-cased ticket text."""
+    return ("bill" in text or "charge" in text), ("speed" in text or "slow" in text)
 
+def _plan(billing: bool, speed: bool) -> Tuple[List[str], float]:
     factors: list[str] = []
-    if "bill" in text or "charge" in text:
+    if billing:
         factors.append("last_bill_delta>=+10%")
-    if "speed" in text or "slow" in text:
+    if speed:
         factors.append("avg_down_mbps<10")
     if not factors:
         factors.append("recent_ticket_activity")
 
     # a simple, explainable score (just for demo)
     churn_score = min(0.2 + 0.2 * len(factors), 0.95)
+    return factors[:3], round(churn_score, 2)
 
-    msg = (
-        "We noticed a recent billing change and possible line/speed issues. "
-        "We can review your plan and check your line. Would you like us to schedule a callback?"
-    )
+# only four possible outcomes → computed once, looked up per ticket in batches
+_PLANS = {(b, s): _plan(b, s) for b in (False, True) for s in (False, True)}
+
+def run_stub_flow(ticket: Dict) -> StubResult:
+    """
+    Extremely small, deterministic stand-in for your agent graph.
+    Replace later with real LangGraph nodes and tools.
+    """
+    text = (ticket.get("text") or "").lower()
+    factors, churn_score = _plan(*_factors(text))
 
     return StubResult(
         ticket_id=ticket.get("ticket_id", "T-000"),
-        churn_score=round(churn_score, 2),
-        top_factors=factors[:3],
+        churn_score=churn_score,
+        top_factors=factors,
         proposed_action=ProposedAction(
-            type="plan_review",
-            reason="Billing change + speed concerns",
-            customer_message=msg,
+            type=ACTION_TYPE,
+            reason=ACTION_REASON,
+            customer_message=CUSTOMER_MESSAGE,
         ),
     )
+
+def run_stub_flow_batch(tickets: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    run_stub_flow(t).model_dump() for each ticket, lazily and in input order,
+    without building pydantic models: one lower() + keyword pass per ticket,
+    then a lookup of the precomputed outcome. Raises ValueError for a ticket
+    that StubResult would reject (non-string ticket_id).
+    """
+    for ticket in tickets:
+        tid = ticket.get("ticket_id", "T-000")
+        if not isinstance(tid, str):
+            raise ValueError(f"ticket_id must be a string, got {type(tid).__name__}")
+        factors, churn_score = _PLANS[_factors((ticket.get("text") or "").lower())]
+        yield {
+            "ticket_id": tid,
+            "churn_score": churn_score,
+            "top_factors": list(factors),
+            "proposed_action": {
+                "type": ACTION_TYPE,
+                "reason": ACTION_REASON,
+                "customer_message": CUSTOMER_MESSAGE,
+            },
+        }
@@ -1,21 +1,306 @@
-import csv, os, datetime as dt
-from typing import Dict
+import atexit, bisect, csv, io, logging, os, queue, threading, time, datetime as dt
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
 
 LOG_PATH = "data/action_log.csv"
+log = logging.getLogger(__name__)
 HEADER = ["ts","customer_id","region","final_score","action","proposed_text","pass","violations","missing_disclaimers"]
 
-os.makedirs("data", exist_ok=True)
-if not os.path.exists(LOG_PATH):
-    with open(LOG_PATH, "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(HEADER)
+def ensure_log(path: str = LOG_PATH) -> str:
+    """Create the log (header only) if it doesn't exist yet; nothing touches disk at import."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            with open(path, "x", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(HEADER)
+        except FileExistsError:
+            pass
+    return path
+
+def read_records(path: str, offset: int, max_bytes: Optional[int] = None) -> Tuple[List[List[str]], int]:
+    """
+    Complete CSV records from byte `offset` (header skipped at 0), reading at
+    most `max_bytes` unless a single record is longer; returns (records, end
+    offset). Record ends come from the csv parser itself, so quoted fields with
+    embedded newlines and \n or \r\n line endings are both handled; a trailing
+    partial record (a writer mid-append, or the read limit) is left for the
+    next call.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(max_bytes) if max_bytes else f.read()
+        while True:
+            lines = chunk.split(b"\n")
+            lines.pop()  # bytes after the last \n: never a complete record
+            state = {"fed": 0, "eof": False}
+
+            def feed():
+                for line in lines:
+                    state["fed"] += len(line) + 1
+                    yield line.decode("utf-8") + "\n"  # \n can't split a UTF-8 sequence
+                state["eof"] = True
+
+            records, used = [], 0
+            reader = csv.reader(feed())
+            for rec in reader:
+                if state["eof"]:  # parser ran out of lines mid-record (open quote)
+                    break
+                records.append(rec)
+                used = state["fed"]
+            if records or not max_bytes or len(chunk) < max_bytes:
+                break
+            more = f.read(max_bytes)  # one record longer than the read limit
+            if not more:
+                break
+            chunk += more
+            max_bytes = len(chunk)
+    if offset == 0 and records:
+        records = records[1:]  # header
+    return records, offset + used
+
+def _format_row(row: Dict) -> List:
+    return [
+        dt.datetime.utcnow().isoformat(timespec="seconds"),
+        row["customer_id"], row["region"], row["final_score"],
+        row["action"], row["proposed_text"],
+        row["compliance"]["pass"],
+        "|".join(row["compliance"]["violations"]),
+        "|".join(row["compliance"]["missing_disclaimers"]),
+    ]
+
+# ---------- group-commit writer ----------
+class _Batch:
+    """Rows from one caller; `done` is set once they are durable (or failed)."""
+    __slots__ = ("rows", "done", "error")
+
+    def __init__(self, rows: List[List]):
+        self.rows = rows
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+FSYNC_POLICIES = ("batch", "never")
+
+class GroupCommitWriter:
+    """
+    Single background writer for the action log.
+    Callers enqueue rows and wait; the writer drains everything queued (up to
+    `max_rows`, lingering `max_wait_s` for stragglers), encodes it as CSV and
+    commits it with one O_APPEND write + one fsync. Rows are never interleaved
+    or torn, and N concurrent approvals cost one file sync instead of N.
+    fsync policy: "batch" = fsync every commit, "never" = leave it to the OS.
+    """
+
+    def __init__(self, path: str, max_rows: int, max_wait_s: float, fsync: str):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_wait_s = max_wait_s
+        self.fsync = str(fsync).strip().lower()
+        if self.fsync not in FSYNC_POLICIES:  # a typo must not silently mean "never"
+            raise ValueError(f"ACTION_LOG_FSYNC must be one of {', '.join(FSYNC_POLICIES)}, got {fsync!r}")
+        self._queue: "queue.Queue[Optional[_Batch]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # fn(rows, start_offset, end_offset) after each commit, e.g. dashboard aggregates
+        self._listeners: List[Callable[[List[List], int, int], None]] = []
+
+    def add_listener(self, fn: Callable[[List[List], int, int], None]) -> None:
+        self._listeners.append(fn)
+
+    def submit(self, rows: List[List], wait: bool = True) -> _Batch:
+        self._ensure_started()
+        batch = _Batch(rows)
+        self._queue.put(batch)
+        if wait:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+        return batch
+
+    def close(self) -> None:
+        """Flush everything queued and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="action-log-writer", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: _Batch) -> List[_Batch]:
+        group, n = [first], len(first.rows)
+        deadline = time.monotonic() + self.max_wait_s
+        while n < self.max_rows:
+            timeout = deadline - time.monotonic()
+            try:
+                nxt = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:  # close() requested: commit what we have, then stop
+                self._queue.put(None)
+                break
+            group.append(nxt)
+            n += len(nxt.rows)
+        return group
+
+    def _commit(self, group: List[_Batch]) -> Tuple[List[List], int, int]:
+        """Write + fsync one group; returns (rows, start offset, end offset) for the listeners."""
+        buf = io.StringIO(newline="")
+        w = csv.writer(buf)
+        for b in group:
+            w.writerows(b.rows)
+        data = buf.getvalue().encode("utf-8")
+        new_file = not os.path.exists(self.path)
+        if new_file:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if new_file:
+                header = io.StringIO(newline="")
+                csv.writer(header).writerow(HEADER)
+                data = header.getvalue().encode("utf-8") + data
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.fsync == "batch":
+                os.fsync(fd)
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+        return [r for b in group for r in b.rows], end - len(data), end
+
+    def _notify(self, rows: List[List], start: int, end: int) -> None:
+        for fn in self._listeners:
+            try:
+                fn(rows, start, end)
+            except Exception:
+                log.exception("action-log commit listener failed")
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            group = self._collect(first)
+            committed = None
+            try:
+                committed = self._commit(group)
+            except BaseException as e:  # surface to every waiting caller
+                for b in group:
+                    b.error = e
+            for b in group:  # durable now: release callers before indexing / aggregates
+                b.done.set()
+            if committed is not None:
+                self._notify(*committed)
+
+writer = GroupCommitWriter(
+    LOG_PATH,
+    max_rows=settings.ACTION_LOG_BATCH_ROWS,
+    max_wait_s=settings.ACTION_LOG_MAX_WAIT_MS / 1000.0,
+    fsync=settings.ACTION_LOG_FSYNC,
+)
+atexit.register(writer.close)
+
+def append_actions(rows: List[Dict]) -> int:
+    """Log approvals; returns once they are committed (per ACTION_LOG_FSYNC)."""
+    formatted = [_format_row(r) for r in rows]  # bad rows fail here, in the caller
+    if formatted:
+        writer.submit(formatted)
+    return len(formatted)
 
 def append_action(row: Dict):
-    with open(LOG_PATH, "a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow([
-            dt.datetime.utcnow().isoformat(timespec="seconds"),
-            row["customer_id"], row["region"], row["final_score"],
-            row["action"], row["proposed_text"],
-            row["compliance"]["pass"],
-            "|".join(row["compliance"]["violations"]),
-            "|".join(row["compliance"]["missing_disclaimers"]),
-        ])
+    append_actions([row])
+
+# ---------- running dashboard aggregates ----------
+TRUTHY = {"true", "1", "yes"}  # how the "pass" column is read back (the writer logs True/False)
+
+def _row_day(ts: str) -> Optional[str]:
+    try:
+        return dt.datetime.fromisoformat(ts).date().isoformat()
+    except (TypeError, ValueError):
+        import pandas as pd  # rare: hand-edited timestamps
+        parsed = pd.to_datetime(ts, errors="coerce")
+        return None if pd.isna(parsed) else parsed.date().isoformat()
+
+class ActionLogStats:
+    """
+    Totals, per-day pass/fail and per-action counts over the action log.
+    Built once by reading the file, then kept current from our own group
+    commits; anything appended by someone else is picked up by tailing from
+    the last byte offset. A view costs O(days shown + distinct actions).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self.total = 0
+        self.passed = 0
+        self.days: List[str] = []                     # sorted
+        self.per_day: Dict[str, List[int]] = {}       # day → [rows, passed]
+        self.per_action: Counter = Counter()
+
+    def _add(self, rows: Iterable[List]) -> None:
+        for r in rows:
+            if len(r) < len(HEADER):
+                continue
+            ok = str(r[6]).lower() in TRUTHY
+            self.total += 1
+            self.passed += ok
+            day = _row_day(r[0])
+            if day is not None:
+                if day not in self.per_day:
+                    bisect.insort(self.days, day)
+                    self.per_day[day] = [0, 0]
+                self.per_day[day][0] += 1
+                self.per_day[day][1] += ok
+            if r[4]:
+                self.per_action[r[4]] += 1
+
+    def _tail(self) -> None:
+        if not os.path.exists(self.path):
+            self._reset()
+            return
+        size = os.path.getsize(self.path)
+        if size < self.offset:  # truncated / rotated → rebuild
+            self._reset()
+        if size == self.offset:
+            return
+        rows, self.offset = read_records(self.path, self.offset)
+        self._add(rows)
+
+    def on_commit(self, rows: List[List], start: int, end: int) -> None:
+        with self._lock:
+            if start == self.offset and self.offset > 0:
+                self._add(rows)  # we are exactly caught up → no re-read
+                self.offset = end
+            # otherwise another writer got in between; the next view tails the gap
+
+    def view(self, days: int = 30) -> Tuple[Dict, List[Dict], List[Dict]]:
+        """(stats, trend, by_action) for the dashboard; trend is the last `days` days."""
+        with self._lock:
+            self._tail()
+            stats = {"logged": self.total, "pass_rate": 0.0, "violations": self.total - self.passed}
+            if self.total:
+                stats["pass_rate"] = round(float(self.passed / self.total * 100), 2)
+            trend = [
+                {"date": d, "pass_rate": round(self.per_day[d][1] / self.per_day[d][0] * 100, 2)}
+                for d in self.days[-days:]
+            ]
+            by_action = [
+                {"action": a, "count": n}
+                for a, n in sorted(self.per_action.items(), key=lambda kv: (-kv[1], kv[0]))
+            ]
+        return stats, trend, by_action
+
+stats = ActionLogStats(LOG_PATH)
+writer.add_listener(stats.on_commit)
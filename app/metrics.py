@@ -0,0 +1,241 @@
+# app/metrics.py
+"""
+Lightweight per-stage latency instrumentation.
+
+    with stage("signals.slice"):      # or @timed("signals.slice")
+        ...
+
+Stage durations are collected per request (a ContextVar set by
+`MetricsMiddleware`, which also reaches sync endpoints run in the thread pool)
+and folded into histograms keyed by (endpoint route, stage) when the request
+finishes. Work outside a request (background reloads) is recorded under the
+"background" endpoint. `render()` produces the Prometheus text format for
+/metrics; with SERVER_TIMING on, each response also carries a Server-Timing
+header listing its stages.
+
+METRICS_ENABLED=false makes `stage()` return a shared no-op context manager
+and the middleware is not installed, so the cost is one attribute check.
+"""
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+ENABLED = settings.METRICS_ENABLED
+SERVER_TIMING = ENABLED and settings.SERVER_TIMING
+# seconds; Prometheus-style cumulative buckets (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND = "background"
+
+_NULL = nullcontext()
+
+class _RequestTimings:
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}  # stage → [seconds, calls]
+
+_current: ContextVar[Optional[_RequestTimings]] = ContextVar("t3c_request_timings", default=None)
+
+# ---------- histograms ----------
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str], Histogram] = {}       # (endpoint, method)
+        self.responses: Dict[Tuple[str, str, str], int] = {}        # (endpoint, method, status)
+        self.stages: Dict[Tuple[str, str], Histogram] = {}         # (endpoint, stage)
+        self.stage_calls: Dict[Tuple[str, str], int] = {}
+        self.gauges: Dict[str, Tuple[str, float]] = {}             # name → (help, value)
+
+    def _stage(self, endpoint: str, name: str, seconds: float, calls: int) -> None:
+        key = (endpoint, name)
+        h = self.stages.get(key)
+        if h is None:
+            h = self.stages[key] = Histogram()
+        h.observe(seconds)
+        self.stage_calls[key] = self.stage_calls.get(key, 0) + calls
+
+    def observe_stage(self, endpoint: str, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self._stage(endpoint, name, seconds, calls)
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float,
+                        stages: Dict[str, List[float]]) -> None:
+        with self._lock:
+            h = self.requests.get((endpoint, method))
+            if h is None:
+                h = self.requests[(endpoint, method)] = Histogram()
+            h.observe(seconds)
+            key = (endpoint, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+            for name, (secs, calls) in stages.items():
+                self._stage(endpoint, name, secs, int(calls))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.responses.clear()
+            self.stages.clear()
+            self.stage_calls.clear()
+
+registry = Registry()
+
+def set_gauge(name: str, help_text: str, value: float) -> None:
+    """One-off process values (e.g. startup timings), rendered as Prometheus gauges."""
+    with registry._lock:
+        registry.gauges[name] = (help_text, float(value))
+
+# ---------- stage timers ----------
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        req = _current.get()
+        if req is None:
+            registry.observe_stage(BACKGROUND, self.name, dt)
+        else:
+            acc = req.stages.get(self.name)
+            if acc is None:
+                req.stages[self.name] = [dt, 1]
+            else:
+                acc[0] += dt
+                acc[1] += 1
+        return False
+
+def stage(name: str):
+    """Context manager timing one stage of the current request (no-op when disabled)."""
+    return _Stage(name) if ENABLED else _NULL
+
+def timed(name: str):
+    """Decorator form of `stage`."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+# ---------- ASGI middleware ----------
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    return "unmatched"  # 404s etc.; raw paths would explode label cardinality
+
+def _server_timing(stages: Dict[str, List[float]], app_seconds: float) -> bytes:
+    parts = [f"{name.replace('.', '-')};dur={secs * 1000:.2f}" for name, (secs, _) in stages.items()]
+    parts.append(f"app;dur={app_seconds * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+class MetricsMiddleware:
+    """Times every HTTP request and its stages; adds Server-Timing when enabled."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = _RequestTimings()
+        token = _current.set(timings)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings.stages, time.perf_counter() - t0)))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            registry.observe_request(_route_path(scope), scope["method"], status,
+                                     time.perf_counter() - t0, timings.stages)
+
+# ---------- Prometheus text ----------
+def _labels(**kv) -> str:
+    def esc(v: str) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{k}="{esc(v)}"' for k, v in kv.items())
+
+def _histogram_lines(name: str, labels: str, h: Histogram) -> List[str]:
+    out, cum = [], 0
+    sep = "," if labels else ""
+    for le, n in zip(BUCKETS, h.counts):
+        cum += n
+        out.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cum}')
+    out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {h.count}')
+    out.append(f"{name}_sum{{{labels}}} {h.sum!r}")
+    out.append(f"{name}_count{{{labels}}} {h.count}")
+    return out
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    if not ENABLED:
+        return "# metrics disabled (METRICS_ENABLED=false)\n"
+    with registry._lock:
+        lines = [
+            "# HELP t3c_request_duration_seconds End-to-end request latency per endpoint.",
+            "# TYPE t3c_request_duration_seconds histogram",
+        ]
+        for (ep, method), h in sorted(registry.requests.items()):
+            lines += _histogram_lines("t3c_request_duration_seconds", _labels(endpoint=ep, method=method), h)
+        lines += [
+            "# HELP t3c_requests_total Requests per endpoint and status code.",
+            "# TYPE t3c_requests_total counter",
+        ]
+        for (ep, method, status), n in sorted(registry.responses.items()):
+            lines.append(f"t3c_requests_total{{{_labels(endpoint=ep, method=method, status=status)}}} {n}")
+        lines += [
+            "# HELP t3c_stage_duration_seconds Time per request spent in each stage.",
+            "# TYPE t3c_stage_duration_seconds histogram",
+        ]
+        for (ep, name), h in sorted(registry.stages.items()):
+            lines += _histogram_lines("t3c_stage_duration_seconds", _labels(endpoint=ep, stage=name), h)
+        lines += [
+            "# HELP t3c_stage_calls_total Times each stage ran.",
+            "# TYPE t3c_stage_calls_total counter",
+        ]
+        for (ep, name), n in sorted(registry.stage_calls.items()):
+            lines.append(f"t3c_stage_calls_total{{{_labels(endpoint=ep, stage=name)}}} {n}")
+        for name, (help_text, value) in sorted(registry.gauges.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value!r}"]
+    return "\n".join(lines) + "\n"
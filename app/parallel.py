@@ -0,0 +1,128 @@
+# app/parallel.py
+"""
+Opt-in multi-core scoring backend.
+
+Scoring is CPU-bound Python (md5 seeds per customer), so under the GIL a second
+large request queues behind the first. With SCORING_WORKERS > 0 that hashing
+is split into contiguous row-range shards run in a process pool and stitched
+back in input order (hash_pairs): score_frame_parallel uses it for every row
+the score table doesn't hold, and score_table.build for the distinct
+(customer_id, region) pairs it publishes. top_k_parallel scores whole shards
+and each returns only its local top-K for the parent to merge.
+Below SCORING_PARALLEL_MIN_ROWS (or with 0 workers) everything runs inline.
+Workers are spawned, not forked, so they never inherit the parent's threads
+or locks (uvicorn, the log writer). If a worker dies the pool is dropped, the
+request is scored inline and the next one starts a fresh pool.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import rank_frame, region_biases, score_frame, severity_crs_batch
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.SCORING_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _discard(pool: ProcessPoolExecutor) -> None:
+    # a broken pool stays broken; forget it (unless another thread already has)
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _map(fn, *args) -> Optional[List]:
+    """pool.map over the shards, or None if the pool broke (a worker was killed)."""
+    pool = _get_pool()
+    try:
+        return list(pool.map(fn, *args))
+    except BrokenProcessPool:
+        log.warning("scoring pool broke; scoring this request inline", exc_info=True)
+        _discard(pool)
+        return None
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+atexit.register(shutdown)
+
+def _use_pool(n_rows: int) -> bool:
+    return settings.SCORING_WORKERS > 0 and n_rows >= settings.SCORING_PARALLEL_MIN_ROWS
+
+def _bounds(n: int) -> List[Tuple[int, int]]:
+    edges = np.linspace(0, n, settings.SCORING_WORKERS + 1).astype(int)
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+def _shards(df: pd.DataFrame) -> List[pd.DataFrame]:
+    # only the columns scoring needs cross the process boundary
+    cols = df[["customer_id", "region", "CPI"]]
+    cols = cols.assign(customer_id=cols["customer_id"].astype(str), region=cols["region"].astype(str))
+    return [cols.iloc[a:b] for a, b in _bounds(len(cols))]
+
+def _biases(regions) -> Dict[str, int]:
+    # region biases once in the parent rather than once per shard
+    return region_biases(np.unique(np.asarray(regions).astype(str)))
+
+# ---------- worker entry points (module-level so they pickle) ----------
+def _hash_shard(ids: np.ndarray, regs: np.ndarray, bias: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    return severity_crs_batch(ids, regs, bias)
+
+def _top_k_shard(shard: pd.DataFrame, bias: Dict[str, int], k: int) -> pd.DataFrame:
+    return rank_frame(score_frame(shard, bias)).head(k)
+
+# ---------- public API ----------
+def hash_pairs(customer_ids: Sequence[str], regions: Sequence[str],
+               bias_by_region: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """severity_crs_batch (same rows, same order), sharded across the pool when enabled."""
+    ids = np.asarray(customer_ids).astype(str)
+    regs = np.asarray(regions).astype(str)
+    if not _use_pool(len(ids)):
+        return severity_crs_batch(ids, regs, bias_by_region)
+    bias = bias_by_region or _biases(regs)
+    bounds = _bounds(len(ids))
+    parts = _map(_hash_shard, [ids[a:b] for a, b in bounds], [regs[a:b] for a, b in bounds],
+                 [bias] * len(bounds))
+    if parts is None:
+        return severity_crs_batch(ids, regs, bias)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def score_frame_parallel(df: pd.DataFrame, scores=None) -> pd.DataFrame:
+    """
+    score_frame(df) (same rows, same order); the rows that need hashing (all of
+    them, or those missing from the `scores` table) are hashed across the pool.
+    """
+    return score_frame(df, scores=scores, hasher=hash_pairs)
+
+def top_k_parallel(df: pd.DataFrame, k: int) -> pd.DataFrame:
+    """Top-k ranked scored rows (rank_frame order); each shard ships back only its own top-k."""
+    if not _use_pool(len(df)):
+        return rank_frame(score_frame(df)).head(k).reset_index(drop=True)
+    bias = _biases(df["region"])
+    shards = _shards(df)
+    parts = _map(_top_k_shard, shards, [bias] * len(shards), [k] * len(shards))
+    if parts is None:
+        return rank_frame(score_frame(df, bias)).head(k).reset_index(drop=True)
+    return rank_frame(pd.concat(parts, ignore_index=True)).head(k).reset_index(drop=True)
@@ -0,0 +1,100 @@
+# app/rollup.py
+"""
+Weekly CPI rollups: one cell per (date, region) partition holding
+count, sum and a 101-bin histogram of CPI values.
+
+CPI is an integer on 0..100 (score_cpi clamps it), so the histogram is a
+lossless, mergeable quantile sketch: a region/date-window query just adds
+up the matching cells and reads the order statistics off the cumulative
+counts. Error bounds are therefore zero —
+  - records / avg_cpi / trend are exact (integer sums, one division)
+  - p90_cpi is exact: the same linear interpolation pandas/numpy use,
+    applied to the exact neighbouring order statistics
+When a CSV carries its own CPI column that is not integral in 0..100
+(or has gaps) no rollup is built and callers fall back to a row scan.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CPI_BINS = 101  # CPI values 0..100
+Key = Tuple[pd.Timestamp, str]
+
+@dataclass(frozen=True)
+class CpiRollup:
+    keys: List[Key]        # cell i ↔ partition key keys[i]
+    counts: np.ndarray     # int64[cells]
+    sums: np.ndarray       # int64[cells]
+    hist: np.ndarray       # int64[cells, CPI_BINS]
+
+    def cells(self, region=None, start=None, end=None) -> np.ndarray:
+        """Indices of the cells matching a region and/or [start, end] window."""
+        return np.array([
+            i for i, (d, r) in enumerate(self.keys)
+            if (region is None or r == region)
+            and (start is None or d >= start)
+            and (end is None or d <= end)
+        ], dtype=np.int64)
+
+    def summary(self, region=None, start=None, end=None, trend_weeks: int = 12) -> Optional[Dict]:
+        """/cpi/summary payload from the matching cells; None when nothing matches."""
+        idx = self.cells(region, start, end)
+        if len(idx) == 0:
+            return None
+        n = int(self.counts[idx].sum())
+        total = int(self.sums[idx].sum())
+        dates = np.array([self.keys[i][0] for i in idx], dtype="datetime64[ns]")
+        # per-week trend: fold the region cells of each date together
+        weeks, inv = np.unique(dates, return_inverse=True)
+        wk_n = np.zeros(len(weeks), dtype=np.int64)
+        wk_sum = np.zeros(len(weeks), dtype=np.int64)
+        np.add.at(wk_n, inv, self.counts[idx])
+        np.add.at(wk_sum, inv, self.sums[idx])
+        tail = slice(max(len(weeks) - trend_weeks, 0), None)
+        return {
+            "records": n,
+            "avg_cpi": total / n,
+            "p90_cpi": int(quantile(self.hist[idx].sum(axis=0), 0.90)),
+            "latest_week": str(pd.Timestamp(weeks[-1]).date()),
+            "trend": [
+                {"date": str(pd.Timestamp(d).date()), "avg_cpi": int(s) / int(c)}
+                for d, s, c in zip(weeks[tail], wk_sum[tail], wk_n[tail])
+            ],
+        }
+
+def quantile(hist: np.ndarray, q: float) -> float:
+    """
+    Linear-interpolated quantile of the values described by `hist`
+    (hist[v] = how many times v occurs); same arithmetic as np.quantile.
+    """
+    n = int(hist.sum())
+    cum = np.cumsum(hist)
+    virtual = np.float64(n - 1) * np.float64(q)
+    lo = int(np.floor(virtual))
+    gamma = virtual - lo
+    a = np.float64(np.searchsorted(cum, lo, side="right"))
+    b = np.float64(np.searchsorted(cum, min(lo + 1, n - 1), side="right"))
+    diff = b - a
+    # numpy's _lerp: interpolate from the nearer end for stability
+    return float(b - diff * (1 - gamma) if gamma >= 0.5 else a + diff * gamma)
+
+def build(frame: pd.DataFrame, partitions: Dict[Key, np.ndarray]) -> Optional[CpiRollup]:
+    """Rollup over the signals partitions, or None if CPI doesn't fit the 0..100 bins."""
+    cpi = frame["CPI"].to_numpy()
+    if cpi.dtype.kind not in "iu":
+        if cpi.dtype.kind != "f" or not np.all(np.isfinite(cpi)) or np.any(cpi != np.floor(cpi)):
+            return None
+    cpi = cpi.astype(np.int64)
+    if len(cpi) and (cpi.min() < 0 or cpi.max() >= CPI_BINS):
+        return None
+    keys = list(partitions)
+    cell = np.empty(len(cpi), dtype=np.int64)
+    for i, k in enumerate(keys):
+        cell[partitions[k]] = i
+    k = len(keys)
+    hist = np.bincount(cell * CPI_BINS + cpi, minlength=k * CPI_BINS).reshape(k, CPI_BINS)
+    counts = hist.sum(axis=1)
+    sums = hist @ np.arange(CPI_BINS, dtype=np.int64)
+    return CpiRollup(keys=keys, counts=counts, sums=sums, hist=hist)
@@ -0,0 +1,138 @@
+# app/score_table.py
+"""
+Per-customer Severity/CRS table shared by every worker.
+
+Severity and CRS depend only on (customer_id, region) — two md5 seeds per
+customer — never on the week's signals, so they are computed once per
+dataset version and published inside that version's signals cache dir:
+
+    <signals cache dir>/scores/
+        meta.json
+        key.npy        "<customer_id>\\x1f<region>", sorted (fixed-width unicode)
+        severity.npy   int8, == severity_0_100(customer_id, region)
+        crs.npy        float64, == crs_0_1(customer_id)
+
+The first process to need it builds it while holding a lock file (hashing on
+the scoring pool when SCORING_WORKERS > 0); the others wait on the lock and
+then attach. Every worker memory-maps the same files
+read-only, so the pages are shared and nobody re-hashes the population. The
+region bias is md5-derived (process-stable), so a value computed by any
+worker, or persisted, is the value every worker would compute.
+With caching disabled (SIGNALS_CACHE_DIR="") the table is built in memory.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.parallel import hash_pairs
+
+try:  # POSIX advisory lock; elsewhere concurrent builders just race to publish
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SUBDIR = "scores"
+_SEP = "\x1f"  # unit separator: can't be confused with a "|" inside an id
+
+def pair_keys(customer_ids, regions) -> np.ndarray:
+    """Lookup keys for (customer_id, region) pairs as a fixed-width unicode array."""
+    ids = np.asarray(customer_ids).astype(str)
+    regs = np.asarray(regions).astype(str)
+    return np.char.add(np.char.add(ids, _SEP), regs)
+
+@dataclass(frozen=True)
+class ScoreTable:
+    key: np.ndarray       # sorted pair_keys
+    severity: np.ndarray  # int8[len(key)]
+    crs: np.ndarray       # float64[len(key)]
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def lookup(self, customer_ids, regions) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(severity int64, crs float64, found mask) per pair; misses hold 0 / NaN."""
+        q = pair_keys(customer_ids, regions)
+        sev = np.zeros(len(q), dtype=np.int64)
+        crs = np.full(len(q), np.nan)
+        if len(self.key) == 0 or len(q) == 0:
+            return sev, crs, np.zeros(len(q), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.key, q), len(self.key) - 1)
+        found = self.key[pos] == q
+        sev[found] = self.severity[pos[found]]
+        crs[found] = self.crs[pos[found]]
+        return sev, crs, found
+
+    def get(self, customer_id: str, region: str) -> Optional[Tuple[int, float]]:
+        """(Severity, CRS) for one pair, or None if the table doesn't hold it."""
+        sev, crs, found = self.lookup([customer_id], [region])
+        return (int(sev[0]), float(crs[0])) if found[0] else None
+
+def build(frame: pd.DataFrame) -> ScoreTable:
+    """Hash every distinct (customer_id, region) pair in the frame once."""
+    pairs = frame[["customer_id", "region"]].drop_duplicates()
+    ids = pairs["customer_id"].astype(str).to_numpy()
+    regs = pairs["region"].astype(str).to_numpy()
+    key = pair_keys(ids, regs)
+    order = np.argsort(key, kind="stable")
+    severity, crs = hash_pairs(ids[order], regs[order])  # across the pool with SCORING_WORKERS > 0
+    return ScoreTable(key=key[order], severity=severity.astype(np.int8), crs=crs)
+
+# ---------- publish / attach ----------
+def _save(d: str, table: ScoreTable) -> None:
+    tmp = tempfile.mkdtemp(prefix=".tmp-scores-", dir=os.path.dirname(d))
+    try:
+        np.save(os.path.join(tmp, "key.npy"), table.key)
+        np.save(os.path.join(tmp, "severity.npy"), table.severity)
+        np.save(os.path.join(tmp, "crs.npy"), table.crs)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": FORMAT_VERSION, "rows": len(table)}, f)
+        os.replace(tmp, d)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(d):
+            raise
+
+def _load(d: str) -> Optional[ScoreTable]:
+    try:
+        with open(os.path.join(d, "meta.json"), encoding="utf-8") as f:
+            if json.load(f).get("format") != FORMAT_VERSION:
+                return None
+        cols = {c: np.asarray(np.load(os.path.join(d, f"{c}.npy"), mmap_mode="r"))
+                for c in ("key", "severity", "crs")}
+        return ScoreTable(**cols)
+    except (OSError, ValueError):
+        return None
+
+def attach(cache_dir: Optional[str], frame: pd.DataFrame) -> ScoreTable:
+    """
+    The score table for the signals cached in `cache_dir` (memory-mapped),
+    building and publishing it first if no process has yet. Without a cache
+    dir, or if it can't be written, the table is built in memory.
+    """
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return build(frame)
+    d = os.path.join(cache_dir, SUBDIR)
+    table = _load(d)
+    if table is not None:
+        return table
+    try:
+        with open(os.path.join(cache_dir, SUBDIR + ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # one builder; the rest wait, then attach
+            table = _load(d)
+            if table is None:
+                _save(d, build(frame))
+                table = _load(d)
+    except OSError:
+        log.warning("could not publish score table in %s", cache_dir, exc_info=True)
+    return table if table is not None else build(frame)
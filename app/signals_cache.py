@@ -0,0 +1,145 @@
+# app/signals_cache.py
+"""
+Binary columnar cache for the normalized signals frame.
+
+After the first CSV parse + normalization we write one .npy file per column
+(plus the (date, region) partition index) into a directory keyed by the source
+file's dataset version. Later loads memory-map those files read-only, so there
+is no parsing at all and several workers share the same page-cache pages.
+
+Layout:  <SIGNALS_CACHE_DIR>/<source stem>-<version>-v<FORMAT_VERSION>/
+           meta.json               column order + how each column is stored
+           <col>.npy               numeric / bool / datetime columns (mmap)
+           <col>.codes.npy         categorical codes (+ <col>.categories.npy)
+           partitions.*.npy        flattened partition index
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+
+# bump whenever the on-disk layout or the loader's normalization changes
+FORMAT_VERSION = 3
+Partitions = Dict[Tuple[pd.Timestamp, str], np.ndarray]
+
+def cache_dir(source: str, version: str) -> Optional[str]:
+    """Cache directory for (source file, version); None when caching is disabled."""
+    if not settings.SIGNALS_CACHE_DIR:
+        return None
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(settings.SIGNALS_CACHE_DIR, f"{stem}-{version}-v{FORMAT_VERSION}")
+
+# ---------- write ----------
+def _save_column(d: str, name: str, s: pd.Series) -> Dict:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        np.save(os.path.join(d, f"{name}.codes.npy"), s.cat.codes.to_numpy())
+        cats = s.cat.categories.to_numpy()
+        if cats.dtype == object and all(isinstance(v, str) for v in cats):
+            cats = cats.astype(str)  # e.g. customer ids: no pickle, loads as one buffer
+        np.save(os.path.join(d, f"{name}.categories.npy"), cats, allow_pickle=cats.dtype == object)
+        return {"name": name, "kind": "category", "ordered": bool(s.cat.ordered)}
+    if s.dtype == object:
+        values = s.to_numpy()
+        if all(isinstance(v, str) for v in values):
+            # fixed-width unicode is mmap-able; turned back into str objects on load
+            np.save(os.path.join(d, f"{name}.npy"), values.astype(str))
+            return {"name": name, "kind": "str"}
+        np.save(os.path.join(d, f"{name}.npy"), values, allow_pickle=True)
+        return {"name": name, "kind": "object"}
+    np.save(os.path.join(d, f"{name}.npy"), s.to_numpy())
+    return {"name": name, "kind": "array"}
+
+def save(source: str, version: str, frame: pd.DataFrame, partitions: Partitions) -> Optional[str]:
+    """Write the cache for (source, version) atomically; stale versions are removed."""
+    final = cache_dir(source, version)
+    if final is None or os.path.isdir(final):
+        return final
+    parent = os.path.dirname(final)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        columns = [_save_column(tmp, f"c{i}", frame[c]) | {"column": c} for i, c in enumerate(frame.columns)]
+        keys = list(partitions)
+        lengths = np.array([len(partitions[k]) for k in keys], dtype=np.int64)
+        flat = np.concatenate([partitions[k] for k in keys]) if keys else np.empty(0, dtype=np.int64)
+        np.save(os.path.join(tmp, "partitions.positions.npy"), flat)
+        np.save(os.path.join(tmp, "partitions.lengths.npy"), lengths)
+        meta = {
+            "format": FORMAT_VERSION,
+            "source": os.path.abspath(source),
+            "version": version,
+            "rows": int(len(frame)),
+            "columns": columns,
+            "partition_keys": [[str(d), r] for d, r in keys],
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, final)  # publish; readers never see a half-written dir
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(final):  # lost a race to another worker → fine
+            raise
+    _remove_stale(source, keep=final)
+    return final
+
+def _remove_stale(source: str, keep: str) -> None:
+    # only this source's own <stem>-<mtime hex>-<size hex>-v<N> dirs: "signals" must not
+    # sweep up "signals-2024-..." belonging to another file in the same cache dir
+    stem = os.path.splitext(os.path.basename(source))[0]
+    own = re.compile(re.escape(stem) + r"-[0-9a-f]+-[0-9a-f]+-v\d+")
+    parent = os.path.dirname(keep)
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if own.fullmatch(name) and path != keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+# ---------- read ----------
+def _mmap(path: str) -> np.ndarray:
+    # plain read-only ndarray view over the mapping (np.memmap leaks into pandas otherwise)
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+def _load_column(d: str, spec: Dict):
+    base = os.path.join(d, spec["name"])
+    kind = spec["kind"]
+    if kind == "category":
+        cats = np.load(base + ".categories.npy", allow_pickle=True)
+        if cats.dtype.kind == "U":
+            cats = cats.astype(object)
+        codes = _mmap(base + ".codes.npy")
+        return pd.Categorical.from_codes(codes, categories=cats, ordered=spec["ordered"])
+    if kind == "str":
+        return _mmap(base + ".npy").astype(object)
+    if kind == "object":
+        return np.load(base + ".npy", allow_pickle=True)
+    return _mmap(base + ".npy")
+
+def load(source: str, version: str) -> Optional[Tuple[pd.DataFrame, Partitions]]:
+    """(frame, partitions) from the cache, or None on a miss / unreadable cache."""
+    d = cache_dir(source, version)
+    if d is None or not os.path.isfile(os.path.join(d, "meta.json")):
+        return None
+    try:
+        with open(os.path.join(d, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION or meta.get("version") != version:
+            return None
+        data = {spec["column"]: _load_column(d, spec) for spec in meta["columns"]}
+        # copy=False keeps the memory-mapped arrays as-is (no consolidation copy)
+        frame = pd.DataFrame(data, columns=[s["column"] for s in meta["columns"]], copy=False)
+        flat = _mmap(os.path.join(d, "partitions.positions.npy"))
+        lengths = np.load(os.path.join(d, "partitions.lengths.npy"))
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        partitions = {
+            (pd.Timestamp(day), region): flat[bounds[i]:bounds[i + 1]]
+            for i, (day, region) in enumerate(meta["partition_keys"])
+        }
+        return frame, partitions
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,149 @@
+# app/snapshot.py
+"""
+Materialized risk snapshot for the latest week.
+
+Scoring + compliance only change when the signals file changes, so we compute
+them once per dataset version and keep the table in a stable ranking:
+final_score descending, then customer_id ascending. Endpoints slice this
+table instead of re-scoring the population on every request.
+
+The last few versions are retained so keyset-pagination cursors (which name
+the version they were issued for) keep paging the same ranking across reloads.
+"""
+import base64
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import rank_frame
+from app.config import settings
+from app.dataio import Signals, clear_cache, current_signals, latest_week, manager, signals_slice
+from app.guardrails import add_disclaimers, check_message
+from app.metrics import stage
+from app.parallel import score_frame_parallel
+
+@dataclass(frozen=True)
+class RiskSnapshot:
+    version: str          # Signals.version the table was built from
+    week: pd.Timestamp    # latest week that was scored
+    table: pd.DataFrame   # RISK_COLUMNS + proposed_text_fixed, compliance, compliance_fixed
+    by_region: Dict[str, np.ndarray]  # region → ascending positions into `table`
+    # region (None = all) → (-final_score, customer_id) arrays in rank order (ascending), for cursors
+    keys: Dict[Optional[str], Tuple[np.ndarray, np.ndarray]]
+
+    def _positions(self, region: Optional[str]) -> Optional[np.ndarray]:
+        if region is None:
+            return None
+        return self.by_region.get(region, np.empty(0, dtype=np.int64))
+
+    def rows(self, region: Optional[str] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Top `limit` ranked rows (all if None), optionally for one region."""
+        pos = self._positions(region)
+        if pos is None:
+            return self.table if limit is None else self.table.head(limit)
+        return self.table.take(pos if limit is None else pos[:limit])
+
+    def page(self, region: Optional[str], after: Optional[Tuple[float, str]],
+             limit: int) -> Tuple[pd.DataFrame, bool]:
+        """
+        (`limit` ranked rows strictly after the (final_score, customer_id) key
+        `after` — from the start if None —, whether more rows follow).
+        Binary search → page 50 costs the same as page 1.
+        """
+        pos = self._positions(region)
+        empty = (np.empty(0), np.empty(0, dtype=object))
+        neg_scores, ids = self.keys.get(region, empty)
+        start = 0
+        if after is not None:
+            score, cid = after
+            lo = int(np.searchsorted(neg_scores, -score, side="left"))
+            hi = int(np.searchsorted(neg_scores, -score, side="right"))
+            start = lo + int(np.searchsorted(ids[lo:hi], cid, side="right"))
+        stop = start + max(limit, 0)
+        more = stop < len(ids)
+        if pos is None:
+            return self.table.iloc[start:stop], more
+        return self.table.take(pos[start:stop]), more
+
+_lock = threading.Lock()
+# version → snapshot, newest last; older ones only serve cursors issued for them
+_snapshots: "OrderedDict[str, RiskSnapshot]" = OrderedDict()
+
+def _build(sig: Signals) -> RiskSnapshot:
+    wk = latest_week(sig)
+    week_rows = signals_slice(week=wk, sig=sig)
+    with stage("risk.score"):
+        table = score_frame_parallel(week_rows, scores=sig.scores)
+
+    # proposed_text is a template, so compliance is computed per distinct text
+    with stage("risk.compliance"):
+        texts = table["proposed_text"]
+        fixed = {t: add_disclaimers(t) for t in texts.unique()}
+        verdicts = {t: check_message(t) for t in set(fixed) | set(fixed.values())}
+        table["proposed_text_fixed"] = texts.map(fixed)
+        table["compliance"] = texts.map(verdicts)
+        table["compliance_fixed"] = table["proposed_text_fixed"].map(verdicts)
+
+    with stage("risk.rank"):
+        table = rank_frame(table).reset_index(drop=True)
+    by_region = table.groupby("region", sort=False).indices
+    neg_scores, ids = -table["final_score"].to_numpy(), table["customer_id"].to_numpy()
+    keys = {None: (neg_scores, ids)}
+    keys.update({r: (neg_scores[pos], ids[pos]) for r, pos in by_region.items()})
+    return RiskSnapshot(version=sig.version, week=wk, table=table, by_region=by_region, keys=keys)
+
+def get_snapshot(sig: Optional[Signals] = None) -> RiskSnapshot:
+    """Snapshot for `sig` (default: live signals); built once per dataset version."""
+    sig = sig or current_signals()
+    snap = _snapshots.get(sig.version)
+    if snap is not None:
+        return snap
+    with _lock:
+        snap = _snapshots.get(sig.version)
+        if snap is None:
+            snap = _build(sig)
+            _snapshots[sig.version] = snap
+            while len(_snapshots) > max(settings.SNAPSHOT_KEEP_VERSIONS, 1):
+                _snapshots.popitem(last=False)
+        return snap
+
+def snapshot_for_version(version: str) -> Optional[RiskSnapshot]:
+    """A retained snapshot by version (None once it has been evicted)."""
+    return _snapshots.get(version)
+
+def invalidate_snapshot() -> None:
+    """Explicit invalidation hook: forget the snapshots and the cached signals frame."""
+    with _lock:
+        _snapshots.clear()
+    clear_cache()
+
+# ---------- keyset cursors ----------
+def encode_cursor(snap: RiskSnapshot, region: Optional[str], last: pd.Series) -> str:
+    """Opaque cursor: dataset version + region + the last row's ranking key."""
+    raw = json.dumps({"v": snap.version, "r": region, "s": float(last["final_score"]), "c": str(last["customer_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict:
+    """{"v", "r", "s", "c"}; raises ValueError on anything malformed."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(data, dict) or not {"v", "r", "s", "c"} <= data.keys():
+            raise ValueError
+        # types too: a tampered {"s": "abc"} would otherwise fail later, inside page()
+        s = data["s"]
+        if (not isinstance(data["v"], str) or not isinstance(data["c"], str)
+                or not (data["r"] is None or isinstance(data["r"], str))
+                or isinstance(s, bool) or not isinstance(s, (int, float)) or not math.isfinite(s)):
+            raise ValueError
+        return data
+    except (ValueError, TypeError) as e:
+        raise ValueError("malformed cursor") from e
+
+# build the next snapshot during a reload, before the new data is published
+manager.add_warmer(get_snapshot)
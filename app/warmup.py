@@ -0,0 +1,100 @@
+# app/warmup.py
+"""
+Startup warm-up and readiness.
+
+`import app.api` stays light (FastAPI + stdlib): pandas/numpy and the data
+modules are imported here instead, followed by the signals load and the risk
+snapshot build, so the first real request finds everything hot. The FastAPI
+lifespan starts it according to WARMUP:
+  background  serve at once; /readyz answers 503 until the warm-up is done
+  blocking    the server starts accepting requests only after the warm-up
+  off         nothing up front (dev/tests); the first request pays instead
+/healthz never waits on any of this.
+
+Timings are measured from the start of the app.api import: `import_s` is that
+import, `ready_s` is import start → warm-up done. Both are logged, returned
+by /readyz and exported at /metrics.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app import metrics
+
+log = logging.getLogger(__name__)
+
+class WarmUp:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.mode = "off"
+        self.t0: Optional[float] = None          # perf_counter at app.api import start
+        self.import_s: Optional[float] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}        # step → seconds
+
+    def imported(self, t0: float, seconds: float) -> None:
+        self.t0, self.import_s = t0, seconds
+        metrics.set_gauge("t3c_startup_import_seconds", "Time to import app.api.", seconds)
+
+    def _step(self, name: str, fn):
+        t = time.perf_counter()
+        out = fn()
+        self.steps[name] = time.perf_counter() - t
+        return out
+
+    def run(self, mode: str = "blocking") -> bool:
+        """Import the data path, load signals and build the risk snapshot; True when ready."""
+        with self._lock:
+            self.mode = mode
+            if self.ready:
+                return True
+            self.started, self.error, self.steps = time.perf_counter(), None, {}
+            try:
+                def imports():
+                    from app import dataio, export, history, snapshot  # noqa: F401  pandas, numpy, scoring
+                    return dataio, snapshot
+                dataio, snapshot = self._step("imports", imports)
+                # the snapshot runs as a signals warmer, so this covers load + score + rank
+                sig = self._step("signals_and_snapshot", dataio.current_signals)
+                snapshot.get_snapshot(sig)
+                self.ready = True
+            except Exception as e:  # stay not-ready; /readyz shows why
+                log.exception("warm-up failed")
+                self.error = f"{type(e).__name__}: {e}"
+            self.finished = time.perf_counter()
+        st = self.status()
+        if st["ready_s"] is not None:
+            metrics.set_gauge("t3c_startup_ready_seconds",
+                              "Time from app.api import start until warm-up finished.", st["ready_s"])
+            log.info("ready in %.2fs (import %.2fs, warm-up %.2fs: %s)", st["ready_s"], st["import_s"],
+                     st["warmup_s"], ", ".join(f"{k} {v:.2f}s" for k, v in self.steps.items()))
+        return self.ready
+
+    def start(self) -> None:
+        """Warm up in a background thread (WARMUP=background)."""
+        self.mode = "background"
+        threading.Thread(target=self.run, args=("background",), name="warmup", daemon=True).start()
+
+    def skip(self) -> None:
+        """WARMUP=off: report ready right away; data loads on first use."""
+        self.mode = "off"
+        self.ready = True
+
+    def status(self) -> Dict:
+        def rnd(x):
+            return None if x is None else round(x, 4)
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "error": self.error,
+            "import_s": rnd(self.import_s),
+            "warmup_s": rnd(self.finished - self.started) if self.finished and self.started else None,
+            "ready_s": rnd(self.finished - self.t0) if self.ready and self.finished and self.t0 else None,
+            "steps": {k: rnd(v) for k, v in self.steps.items()},
+        }
+
+state = WarmUp()
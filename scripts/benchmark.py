@@ -0,0 +1,312 @@
+# scripts/benchmark.py
+# Latency benchmarks for the data/scoring/compliance paths, run in-process
+# through FastAPI's TestClient against deterministic synthetic signal files.
+#
+# Usage (from the repo root):
+#   python -m scripts.benchmark gen [--scales 20k,200k,2M] [--weeks 4]
+#   python -m scripts.benchmark run [--scales 20k,200k] [--repeat 5] [--out data/bench/results.json]
+#   python -m scripts.benchmark compare BASELINE.json CURRENT.json [--threshold 0.15] [--min-delta-ms 1]
+#
+# Besides the in-process cases, `run` starts fresh interpreters to time cold
+# startup: `import app.api`, time until /readyz says ready (lifespan warm-up:
+# data load + risk snapshot, from the binary cache) and the first request after.
+#
+# `run` generates any missing scale file first. Scale files are cached under
+# data/bench/ (2M customers x 4 weeks is ~8M rows / ~400 MB of CSV and needs
+# several GB of RAM to load). `compare` exits 1 when a case's median got slower
+# than the baseline by more than the threshold.
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.join("data", "bench")
+DEFAULT_SCALES = "20k,200k,2M"
+REGIONS = [
+    # name, base ad intensity (same regions as scripts/generate_competitive_data.py)
+    ("metro_north", 6.0), ("metro_south", 5.0), ("urban_east", 4.5), ("urban_west", 4.0),
+    ("suburb_east", 3.0), ("rural_north", 2.2), ("rural_south", 1.8),
+]
+START_WEEK = pd.Timestamp("2025-01-06")
+
+# ---------- synthetic data scaler ----------
+def parse_scale(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+def scale_path(n: int, weeks: int) -> str:
+    return os.path.join(BENCH_DIR, f"signals-{n}x{weeks}.csv")
+
+def generate(n: int, weeks: int, path: str) -> str:
+    """Deterministic signals CSV (same schema as the real feed, CPI computed on load)."""
+    rng = np.random.default_rng(n * 1000 + weeks)
+    width = max(6, len(str(n)))
+    ids = np.char.add("C", np.char.zfill(np.arange(1, n + 1).astype(str), width))
+    names = np.array([r[0] for r in REGIONS])
+    base_ad = np.array([r[1] for r in REGIONS])
+    reg = rng.choice(len(REGIONS), size=n, p=[0.20, 0.18, 0.16, 0.16, 0.14, 0.08, 0.08])
+    price = rng.random(n) < 0.3
+    renewal = rng.integers(0, max(weeks, 1), size=n)
+    tmp = path + ".tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for w in range(weeks):  # one week per chunk keeps memory flat at 2M customers
+        ad = np.round(np.clip(base_ad + rng.normal(0, 0.5, len(REGIONS)), 0, 10), 2)
+        days = np.where(renewal == w, rng.integers(0, 31, size=n), 30)
+        pd.DataFrame({
+            "date": (START_WEEK + pd.Timedelta(weeks=w)).date(),
+            "customer_id": ids,
+            "region": names[reg],
+            "contract_days_remaining": days,
+            "price_sensitivity_flag": price,
+            "peer_port_count_30d": rng.poisson(0.25, size=n) + (renewal == w) * rng.poisson(0.3, size=n),
+            "weekly_ad_intensity_index": ad[reg],
+        }).to_csv(tmp, mode="a" if w else "w", header=w == 0, index=False)
+    os.replace(tmp, path)
+    return path
+
+def ensure_file(n: int, weeks: int) -> str:
+    path = scale_path(n, weeks)
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        generate(n, weeks, path)
+        print(f"✅ Generated {path} in {time.perf_counter() - t0:.1f}s")
+    return path
+
+# ---------- timing ----------
+def _timed(fn, repeat: int, ops: int = 1, setup=None) -> dict:
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return _summary(runs, ops)
+
+def _summary(runs, ops: int = 1) -> dict:
+    return {
+        "median_s": statistics.median(runs),
+        "min_s": min(runs),
+        "ops": ops,
+        "per_op_ms": statistics.median(runs) / ops * 1000,
+        "runs": runs,
+    }
+
+def _check(resp):
+    if resp.status_code != 200:
+        raise RuntimeError(f"{resp.request.url} → {resp.status_code}: {resp.text[:200]}")
+    return resp
+
+def bench_scale(path: str, repeat: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    from app import dataio, guardrails, snapshot
+    from app.analytics import PROPOSED_TEXT, cpi_batch
+    from app.api import app
+    from app.config import settings
+
+    results = {}
+    cache_dir = settings.SIGNALS_CACHE_DIR
+    heavy = max(1, min(repeat, 3))
+
+    # load: CSV parse + normalization (cache off), then the mmap'd binary cache
+    settings.SIGNALS_CACHE_DIR = ""
+    results["load_csv"] = _timed(lambda: dataio._read_signals(path), heavy)
+    settings.SIGNALS_CACHE_DIR = os.path.join(BENCH_DIR, ".signals_cache")
+    try:
+        dataio.build_signals_cache(path)
+        results["load_cached"] = _timed(lambda: dataio._read_signals(path), repeat)
+
+        dataio.SIGNALS_PATH = path
+        snapshot.invalidate_snapshot()
+        client = TestClient(app)
+        sig = dataio.current_signals()  # also builds the live snapshot (warmer)
+        frame = sig.frame
+        cols = ["contract_days_remaining", "price_sensitivity_flag",
+                "peer_port_count_30d", "weekly_ad_intensity_index"]
+        results["cpi_batch"] = _timed(lambda: cpi_batch(*(frame[c].to_numpy() for c in cols)), repeat)
+
+        # scoring + ranking the latest week (what a reload pays), then serving pages
+        results["risk_snapshot_build"] = _timed(lambda: snapshot._build(sig), heavy)
+        results["top_risk_page"] = _timed(lambda: _check(client.get("/insights/top_risk?limit=100")), repeat)
+        region = REGIONS[0][0]
+        results["top_risk_region_page"] = _timed(
+            lambda: _check(client.get(f"/insights/top_risk?limit=100&region={region}")), repeat)
+        results["cpi_top"] = _timed(lambda: _check(client.get("/cpi/top?limit=100")), repeat)
+
+        results["summary"] = _timed(lambda: _check(client.get("/cpi/summary")), repeat)
+        results["summary_region_window"] = _timed(lambda: _check(client.get(
+            f"/cpi/summary?region={region}&start={START_WEEK.date()}&end={(START_WEEK + pd.Timedelta(weeks=1)).date()}"
+        )), repeat)
+
+        ids = frame["customer_id"].to_numpy()
+        sample = [str(ids[i]) for i in np.random.default_rng(0).integers(0, len(ids), size=200)]
+
+        def lookups():
+            for cid in sample:
+                _check(client.get(f"/insights/customer/{cid}"))
+        results["customer_lookup"] = _timed(lookups, repeat, ops=len(sample))
+
+        # compliance: distinct texts, cold memo caches each run
+        texts = [f"{PROPOSED_TEXT} Ref {i}. We guarantee the best price." if i % 3 == 0
+                 else f"Offer {i}: {PROPOSED_TEXT}" for i in range(2000)]
+
+        def cold():
+            guardrails._verdict.cache_clear()
+            guardrails.add_disclaimers.cache_clear()
+        results["compliance_batch"] = _timed(lambda: guardrails.check_messages(texts, auto_fix=True),
+                                             repeat, ops=len(texts), setup=cold)
+        results["check_text_api"] = _timed(
+            lambda: [_check(client.post("/utils/check_text", json={"text": t})) for t in texts[:50]],
+            repeat, ops=50, setup=cold)
+
+        for fmt in ("csv", "ndjson", "columnar"):
+            results[f"export_{fmt}"] = _timed(
+                lambda: _check(client.get(f"/admin/download/top_risk?format={fmt}")), heavy)
+    finally:
+        settings.SIGNALS_CACHE_DIR = cache_dir
+    return results
+
+# one cold process: import, warm-up via the lifespan, first request
+_STARTUP_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.api
+imported = time.perf_counter() - t0
+import app.dataio
+app.dataio.SIGNALS_PATH = sys.argv[1]
+from fastapi.testclient import TestClient
+with TestClient(app.api.app) as client:
+    while True:
+        st = client.get("/readyz").json()
+        if st["ready"] or st["error"]:
+            break
+        time.sleep(0.005)
+    if st["error"]:
+        sys.exit(st["error"])
+    ready = time.perf_counter() - t0
+    t = time.perf_counter()
+    client.get("/insights/top_risk?limit=100")
+    first = time.perf_counter() - t
+print(json.dumps({"import": imported, "ready": ready, "first_request": first}))
+"""
+
+def bench_startup(path: str, repeat: int) -> dict:
+    """Cold-start cases, each run in a fresh interpreter (signals cache already built)."""
+    env = dict(os.environ, WARMUP="background", SIGNALS_CACHE_DIR=os.path.join(BENCH_DIR, ".signals_cache"))
+    runs = {"import": [], "ready": [], "first_request": []}
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE, path], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        for k, v in json.loads(out.strip().splitlines()[-1]).items():
+            runs[k].append(v)
+    return {f"startup_{k}": _summary(v) for k, v in runs.items()}
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": dt.datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+# ---------- commands ----------
+def cmd_gen(args):
+    for s in args.scales.split(","):
+        ensure_file(parse_scale(s), args.weeks)
+
+def cmd_run(args):
+    out = {"meta": _meta() | {"weeks": args.weeks, "repeat": args.repeat}, "results": {}}
+    for s in args.scales.split(","):
+        n = parse_scale(s)
+        path = ensure_file(n, args.weeks)
+        print(f"⏱️  {s} customers ({path})")
+        res = bench_scale(path, args.repeat)
+        res.update(bench_startup(path, max(1, min(args.repeat, 3))))
+        out["results"][s.strip()] = res
+        for name, r in res.items():
+            print(f"   {name:<24} median {r['median_s'] * 1000:10.2f} ms   per-op {r['per_op_ms']:9.3f} ms")
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+def cmd_compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    with open(args.current, encoding="utf-8") as f:
+        cur = json.load(f)["results"]
+    regressions = 0
+    print(f"{'scale':<7} {'case':<24} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for scale, cases in cur.items():
+        for name, r in cases.items():
+            b = base.get(scale, {}).get(name)
+            if b is None:
+                print(f"{scale:<7} {name:<24} {'-':>12} {r['median_s'] * 1000:12.2f}      new")
+                continue
+            old_ms, new_ms = b["median_s"] * 1000, r["median_s"] * 1000
+            change = new_ms / old_ms - 1 if old_ms else 0.0
+            slower = change > args.threshold and new_ms - old_ms > args.min_delta_ms
+            regressions += slower
+            flag = "  ⚠️ REGRESSION" if slower else ""
+            print(f"{scale:<7} {name:<24} {old_ms:12.2f} {new_ms:12.2f} {change:+8.1%}{flag}")
+    # a baseline case the current run lacks (crashed, renamed, scale dropped) must not pass silently
+    missing = 0
+    for scale, cases in base.items():
+        for name, b in cases.items():
+            if name not in cur.get(scale, {}):
+                missing += 1
+                print(f"{scale:<7} {name:<24} {b['median_s'] * 1000:12.2f} {'-':>12}  ❌ MISSING")
+    print(f"{'❌' if regressions or missing else '✅'} {regressions} regression(s) over {args.threshold:.0%}, "
+          f"{missing} missing case(s)")
+    return 1 if regressions or missing else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="T3C latency benchmarks.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("gen", help="generate synthetic signal files")
+    p.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated customer counts (default: %(default)s)")
+    p.add_argument("--weeks", type=int, default=4, help="weeks per customer (default: %(default)s)")
+
+    p = sub.add_parser("run", help="time every case at each scale and write JSON results")
+    p.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated customer counts (default: %(default)s)")
+    p.add_argument("--weeks", type=int, default=4, help="weeks per customer (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=5, help="timed runs per case; heavy cases use min(repeat, 3)")
+    p.add_argument("--out", default=os.path.join(BENCH_DIR, "results.json"), help="results file (default: %(default)s)")
+
+    p = sub.add_parser("compare", help="flag regressions against a saved baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown of the median (default: %(default)s)")
+    p.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "gen":
+        cmd_gen(args)
+    elif args.cmd == "run":
+        cmd_run(args)
+    else:
+        return cmd_compare(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
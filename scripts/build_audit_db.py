@@ -0,0 +1,27 @@
+# scripts/build_audit_db.py
+# Builds (or catches up) the SQLite audit store from data/action_log.csv so a
+# large existing log is indexed ahead of time instead of on the first query.
+# Usage: python -m scripts.build_audit_db [--rebuild]
+
+import argparse
+import os
+import time
+
+from app import audit
+from app.config import settings
+
+parser = argparse.ArgumentParser(description="Index the action log into the SQLite audit store.")
+parser.add_argument("--rebuild", action="store_true", help="drop the database and index the whole CSV again")
+args = parser.parse_args()
+
+if audit.store is None:
+    print("⚠️ ACTION_LOG_DB is empty; the audit store is disabled")
+else:
+    if args.rebuild:
+        audit.store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(settings.ACTION_LOG_DB + suffix):
+                os.remove(settings.ACTION_LOG_DB + suffix)
+    t0 = time.perf_counter()
+    rows = audit.store.sync()
+    print(f"✅ {rows} action(s) indexed in {settings.ACTION_LOG_DB} ({time.perf_counter() - t0:.2f}s)")
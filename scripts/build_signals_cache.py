@@ -0,0 +1,21 @@
+# scripts/build_signals_cache.py
+# Builds (or refreshes) the binary columnar cache for the signals file so API
+# workers memory-map it at startup instead of parsing the CSV.
+# Usage: python -m scripts.build_signals_cache [--path data/customers.csv] [--force]
+
+import argparse
+import time
+
+from app.dataio import SIGNALS_PATH, build_signals_cache, dataset_version
+
+parser = argparse.ArgumentParser(description="Build the binary signals cache.")
+parser.add_argument("--path", default=SIGNALS_PATH, help="signals CSV (default: %(default)s)")
+parser.add_argument("--force", action="store_true", help="rebuild even if a cache for this version exists")
+args = parser.parse_args()
+
+t0 = time.perf_counter()
+out = build_signals_cache(args.path, force=args.force)
+if out is None:
+    print("⚠️ SIGNALS_CACHE_DIR is empty; caching is disabled")
+else:
+    print(f"✅ Cache for {args.path} (version {dataset_version(args.path)}) at {out} in {time.perf_counter() - t0:.2f}s")
@@ -1,22 +1,42 @@
 # scripts/generate_competitive_data.py
 # Generates a 12-month synthetic dataset for competitive-offer churn signals.
 # Output: data/customers.csv, data/competitive_signals_2025.csv
+# Run from the repo root: python -m scripts.generate_competitive_data
+#   [--customers 20000] [--mode vectorized|loop] [--chunk-rows 250000] [--out-dir data]
+#
+# Both modes draw from the same seeded RNG in the same order, so for a given
+# --customers they write byte-identical files. "vectorized" (default) draws whole
+# arrays, looks ad intensity up in a (region, week) table and streams the weekly
+# rows to disk a chunk at a time (memory ~ customers x weeks small ints, not rows
+# of dicts), which is what makes 10M+ row files practical. "loop" is the original
+# row-by-row reference implementation.
 
-import os, math, random
+import argparse, os, math, random
 import numpy as np
 import pandas as pd
 from datetime import date, timedelta
 
+from app.analytics import cpi_batch
+
+parser = argparse.ArgumentParser(description="Generate the synthetic competitive-signals dataset.")
+parser.add_argument("--customers", type=int, default=20000, help="number of customers (default: %(default)s)")
+parser.add_argument("--mode", choices=["vectorized", "loop"], default="vectorized",
+                    help="vectorized + chunked (default) or the original per-row loop")
+parser.add_argument("--chunk-rows", type=int, default=250_000,
+                    help="weekly rows per write in vectorized mode (default: %(default)s)")
+parser.add_argument("--out-dir", default="data", help="output directory (default: %(default)s)")
+args = parser.parse_args()
+
 random.seed(42)
 np.random.seed(42)
 
-OUT_DIR = "data"
+OUT_DIR = args.out_dir
 os.makedirs(OUT_DIR, exist_ok=True)
 
 # --------------------------
 # Config (tweak freely)
 # --------------------------
-N_CUSTOMERS      = 20000          # increase if your laptop can handle it
+N_CUSTOMERS      = args.customers # 20000 by default; vectorized mode scales to millions
 WEEKS_BACK       = 52             # 1 year
 YEAR_START_MONDAY = date(date.today().year, 1, 6) - timedelta(weeks=52)  # approx last year
 
@@ -32,26 +52,7 @@ REGIONS = [
 ]
 
 PLAN_TIERS = ["basic", "standard", "premium"]
-
-# --------------------------
-# Helper: CPI (same as app/scoring.py)
-# --------------------------
-def score_cpi(contract_days_remaining: int,
-              price_sensitivity_flag: bool,
-              peer_port_count_30d: int,
-              weekly_ad_intensity_index: float) -> int:
-    days = int(contract_days_remaining)
-    price = 1 if price_sensitivity_flag else 0
-    peer_ports = int(peer_port_count_30d)
-    ad_idx = float(weekly_ad_intensity_index)
-
-    days_term = max(0, 100 - min(days, 100))
-    price_term = 100 if price == 1 else 0
-    peer_term = min(peer_ports * 10, 100)
-    ad_term = int(round(min(ad_idx * 10, 100)))
-
-    cpi = int(round(0.35*days_term + 0.25*price_term + 0.25*peer_term + 0.15*ad_term))
-    return min(max(cpi, 0), 100)
+VECTORIZED = args.mode == "vectorized"
 
 # --------------------------
 # 1) Customers master
@@ -70,18 +71,27 @@ tier_weights = np.array([0.45, 0.40, 0.15])  # basic, standard, premium
 customer_tiers = np.random.choice(PLAN_TIERS, size=N_CUSTOMERS, p=tier_weights)
 
 # Tenure months (skew older for premium)
-tenure = []
-for t in customer_tiers:
-    if t == "premium":
-        tenure.append(int(np.clip(np.random.normal(48, 12), 6, 120)))
-    elif t == "standard":
-        tenure.append(int(np.clip(np.random.normal(30, 10), 3, 120)))
-    else:
-        tenure.append(int(np.clip(np.random.normal(18, 9), 1, 120)))
-
 # Price sensitivity flag baseline probability by tier
 tier_price_p = {"basic": 0.40, "standard": 0.25, "premium": 0.12}
-price_flags = [np.random.rand() < tier_price_p[t] for t in customer_tiers]
+if VECTORIZED:
+    # one normal per customer with per-tier loc/scale → the same draws, in order
+    tier_idx = pd.Index(PLAN_TIERS).get_indexer(customer_tiers)
+    tenure_loc   = np.array([18, 30, 48])[tier_idx]   # basic, standard, premium
+    tenure_scale = np.array([9, 10, 12])[tier_idx]
+    tenure_low   = np.array([1, 3, 6])[tier_idx]
+    tenure = np.clip(np.random.normal(tenure_loc, tenure_scale), tenure_low, 120).astype(int)
+    price_p = np.array([tier_price_p[t] for t in PLAN_TIERS])[tier_idx]
+    price_flags = np.random.rand(N_CUSTOMERS) < price_p
+else:
+    tenure = []
+    for t in customer_tiers:
+        if t == "premium":
+            tenure.append(int(np.clip(np.random.normal(48, 12), 6, 120)))
+        elif t == "standard":
+            tenure.append(int(np.clip(np.random.normal(30, 10), 3, 120)))
+        else:
+            tenure.append(int(np.clip(np.random.normal(18, 9), 1, 120)))
+    price_flags = [np.random.rand() < tier_price_p[t] for t in customer_tiers]
 
 customers_df = pd.DataFrame({
     "customer_id": cust_ids,
@@ -110,81 +120,148 @@ for rname, base, comp, _arpu in REGIONS:
         region_week_rows.append({"date": wk, "region": rname, "weekly_ad_intensity_index": round(val, 2)})
 
 region_week_df = pd.DataFrame(region_week_rows)
+# (region, week) lookup table for the vectorized path: ad_table[region_idx, week_idx]
+ad_table = region_week_df["weekly_ad_intensity_index"].to_numpy().reshape(len(REGIONS), WEEKS_BACK)
 
-# --------------------------
-# 3) Household peer ports per customer per week
-#    Poisson rate depends on region competitiveness
-# --------------------------
 region_comp = {r[0]: r[2] for r in REGIONS}  # competitiveness multiplier
-peer_rows = []
-for cid, rname in zip(cust_ids, customer_regions):
-    lam = 0.2 * region_comp[rname]  # typical 0..~0.24
-    # draw per-week ports with occasional spikes near contract end (added later)
-    base_ports = np.random.poisson(lam=lam, size=WEEKS_BACK)
-    peer_rows.append(base_ports)
+signals_path = os.path.join(OUT_DIR, "competitive_signals_2025.csv")
 
-peer_ports_arr = np.vstack(peer_rows)  # shape: (N_CUSTOMERS, WEEKS_BACK)
+def spike_cells(end_wks):
+    """(row offsets, week) of the contract-window weeks w-6..w per customer, in draw order."""
+    w0 = np.maximum(0, end_wks - 6)
+    w1 = np.minimum(WEEKS_BACK - 1, end_wks)
+    lens = w1 - w0 + 1
+    rows = np.repeat(np.arange(len(end_wks)), lens)
+    starts = np.cumsum(lens) - lens
+    cols = np.repeat(w0, lens) + (np.arange(lens.sum()) - np.repeat(starts, lens))
+    return rows, cols
 
-# --------------------------
-# 4) Contract days remaining (≤ 30) — focus window near renewal
-#    Pick a contract-end week; for 6 weeks before it, we fill 42..0 then cap to 30.
-#    For other weeks, set to 30 (i.e., "not in window").
-# --------------------------
-end_weeks = np.random.randint(low=8, high=WEEKS_BACK-2, size=N_CUSTOMERS)  # renewal somewhere in the year
-contr_days = np.full((N_CUSTOMERS, WEEKS_BACK), 30, dtype=int)  # default 30 (outside window)
-for i in range(N_CUSTOMERS):
-    end_wk = end_weeks[i]
-    # last 6 weeks window
-    for offset in range(6, -1, -1):  # 6..0 weeks
-        wk = end_wk - (6 - offset)
-        if 0 <= wk < WEEKS_BACK:
-            days = offset * 7  # 42,35,28,...,0
-            contr_days[i, wk] = min(days, 30)
-
-# spike peer ports slightly inside window
-for i in range(N_CUSTOMERS):
-    w = end_weeks[i]
-    w0, w1 = max(0, w-6), min(WEEKS_BACK-1, w)
-    peer_ports_arr[i, w0:w1+1] += np.random.poisson(lam=0.3, size=(w1-w0+1))
+if VECTORIZED:
+    # --------------------------
+    # 3) Household peer ports per customer per week (customers x weeks, small ints)
+    #    Drawn in customer blocks: same element order as one size=52 draw per customer.
+    # --------------------------
+    BLOCK = max(1, args.chunk_rows // WEEKS_BACK)
+    cust_lam = 0.2 * np.array([region_comp[r] for r in customer_regions])  # typical 0..~0.24
+    peer_ports_arr = np.empty((N_CUSTOMERS, WEEKS_BACK), dtype=np.int16)
+    for i0 in range(0, N_CUSTOMERS, BLOCK):
+        i1 = min(i0 + BLOCK, N_CUSTOMERS)
+        peer_ports_arr[i0:i1] = np.random.poisson(lam=cust_lam[i0:i1, None], size=(i1 - i0, WEEKS_BACK))
 
-# --------------------------
-# 5) Build weekly customer rows + CPI
-# --------------------------
-rows = []
-for idx, cid in enumerate(cust_ids):
-    rname = customer_regions[idx]
-    price_flag = bool(price_flags[idx])
-
-    for w_idx, wk in enumerate(weeks):
-        ad_idx = region_week_df.loc[
-            (region_week_df["region"] == rname) & (region_week_df["date"] == wk),
-            "weekly_ad_intensity_index"
-        ].iloc[0]
-        ports30 = int(peer_ports_arr[idx, w_idx])
-        cdr = int(contr_days[idx, w_idx])
-
-        cpi = score_cpi(
-            contract_days_remaining=cdr,
-            price_sensitivity_flag=price_flag,
-            peer_port_count_30d=ports30,
-            weekly_ad_intensity_index=ad_idx,
-        )
+    # --------------------------
+    # 4) Contract days remaining — computed per output chunk from end_weeks (see loop mode)
+    # --------------------------
+    end_weeks = np.random.randint(low=8, high=WEEKS_BACK-2, size=N_CUSTOMERS)  # renewal somewhere in the year
+
+    # spike peer ports slightly inside window (one poisson stream, customer by customer)
+    for i0 in range(0, N_CUSTOMERS, BLOCK):
+        i1 = min(i0 + BLOCK, N_CUSTOMERS)
+        rows, cols = spike_cells(end_weeks[i0:i1])
+        peer_ports_arr[i0 + rows, cols] += np.random.poisson(lam=0.3, size=len(rows)).astype(np.int16)
 
-        rows.append({
-            "date": wk,
-            "customer_id": cid,
-            "region": rname,
-            "contract_days_remaining": cdr,                 # ≤ 30 by construction
-            "price_sensitivity_flag": price_flag,
-            "peer_port_count_30d": ports30,
-            "weekly_ad_intensity_index": ad_idx,
-            "CPI": cpi
+    # --------------------------
+    # 5) Stream weekly customer rows + CPI, sorted by (date, customer_id), chunk by chunk
+    # --------------------------
+    ids_arr = np.array(cust_ids)
+    order = np.argsort(ids_arr, kind="stable")  # identity unless ids outgrow the zero padding
+    region_idx = pd.Index(region_names).get_indexer(customer_regions)
+    week_strs = np.array([str(wk) for wk in weeks])
+    n_rows = N_CUSTOMERS * WEEKS_BACK
+    for k0 in range(0, n_rows, args.chunk_rows):
+        k = np.arange(k0, min(k0 + args.chunk_rows, n_rows))
+        w_idx, cust = k // N_CUSTOMERS, order[k % N_CUSTOMERS]
+        before_end = end_weeks[cust] - w_idx  # weeks until renewal
+        chunk = pd.DataFrame({
+            "date": week_strs[w_idx],
+            "customer_id": ids_arr[cust],
+            "region": customer_regions[cust],
+            # last 6 weeks window: offset*7 days (42..0) capped to 30, else 30
+            "contract_days_remaining": np.where((before_end >= 0) & (before_end <= 6),
+                                                np.minimum((6 - before_end) * 7, 30), 30),
+            "price_sensitivity_flag": price_flags[cust],
+            "peer_port_count_30d": peer_ports_arr[cust, w_idx],
+            "weekly_ad_intensity_index": ad_table[region_idx[cust], w_idx],
         })
+        chunk["CPI"] = cpi_batch(
+            chunk["contract_days_remaining"],
+            chunk["price_sensitivity_flag"],
+            chunk["peer_port_count_30d"],
+            chunk["weekly_ad_intensity_index"],
+        )
+        chunk.to_csv(signals_path, mode="a" if k0 else "w", header=k0 == 0, index=False)
+else:
+    # --------------------------
+    # 3) Household peer ports per customer per week
+    #    Poisson rate depends on region competitiveness
+    # --------------------------
+    peer_rows = []
+    for cid, rname in zip(cust_ids, customer_regions):
+        lam = 0.2 * region_comp[rname]  # typical 0..~0.24
+        # draw per-week ports with occasional spikes near contract end (added later)
+        base_ports = np.random.poisson(lam=lam, size=WEEKS_BACK)
+        peer_rows.append(base_ports)
+
+    peer_ports_arr = np.vstack(peer_rows)  # shape: (N_CUSTOMERS, WEEKS_BACK)
+
+    # --------------------------
+    # 4) Contract days remaining (≤ 30) — focus window near renewal
+    #    Pick a contract-end week; for 6 weeks before it, we fill 42..0 then cap to 30.
+    #    For other weeks, set to 30 (i.e., "not in window").
+    # --------------------------
+    end_weeks = np.random.randint(low=8, high=WEEKS_BACK-2, size=N_CUSTOMERS)  # renewal somewhere in the year
+    contr_days = np.full((N_CUSTOMERS, WEEKS_BACK), 30, dtype=int)  # default 30 (outside window)
+    for i in range(N_CUSTOMERS):
+        end_wk = end_weeks[i]
+        # last 6 weeks window
+        for offset in range(6, -1, -1):  # 6..0 weeks
+            wk = end_wk - (6 - offset)
+            if 0 <= wk < WEEKS_BACK:
+                days = offset * 7  # 42,35,28,...,0
+                contr_days[i, wk] = min(days, 30)
+
+    # spike peer ports slightly inside window
+    for i in range(N_CUSTOMERS):
+        w = end_weeks[i]
+        w0, w1 = max(0, w-6), min(WEEKS_BACK-1, w)
+        peer_ports_arr[i, w0:w1+1] += np.random.poisson(lam=0.3, size=(w1-w0+1))
+
+    # --------------------------
+    # 5) Build weekly customer rows + CPI
+    # --------------------------
+    rows = []
+    for idx, cid in enumerate(cust_ids):
+        rname = customer_regions[idx]
+        price_flag = bool(price_flags[idx])
+
+        for w_idx, wk in enumerate(weeks):
+            ad_idx = region_week_df.loc[
+                (region_week_df["region"] == rname) & (region_week_df["date"] == wk),
+                "weekly_ad_intensity_index"
+            ].iloc[0]
+            ports30 = int(peer_ports_arr[idx, w_idx])
+            cdr = int(contr_days[idx, w_idx])
+
+            rows.append({
+                "date": wk,
+                "customer_id": cid,
+                "region": rname,
+                "contract_days_remaining": cdr,                 # ≤ 30 by construction
+                "price_sensitivity_flag": price_flag,
+                "peer_port_count_30d": ports30,
+                "weekly_ad_intensity_index": ad_idx,
+            })
 
-signals_df = pd.DataFrame(rows).sort_values(["date","customer_id"]).reset_index(drop=True)
+    signals_df = pd.DataFrame(rows).sort_values(["date","customer_id"]).reset_index(drop=True)
+    signals_df["CPI"] = cpi_batch(
+        signals_df["contract_days_remaining"],
+        signals_df["price_sensitivity_flag"],
+        signals_df["peer_port_count_30d"],
+        signals_df["weekly_ad_intensity_index"],
+    )
 
-# Save
-signals_df.to_csv(os.path.join(OUT_DIR, "competitive_signals_2025.csv"), index=False)
+    # Save
+    signals_df.to_csv(signals_path, index=False)
 
-print(f"✅ Wrote {len(customers_df):,} customers to data/customers.csv")
-print(f"✅ Wrote {len(signals_df):,} weekly records to data/competitive_signals_2025.csv")
+n_rows = N_CUSTOMERS * WEEKS_BACK
+print(f"✅ Wrote {len(customers_df):,} customers to {os.path.join(OUT_DIR, 'customers.csv')}")
+print(f"✅ Wrote {n_rows:,} weekly records to {signals_path}")
@@ -0,0 +1,21 @@
+# scripts/ingest_history.py
+# Ingests weekly signals into the week-partitioned history store behind
+# /cpi/movers. Weeks already stored are skipped, so re-running it on a CSV
+# that gained a week only scores and links the new week.
+# Usage: python -m scripts.ingest_history [--csv data/competitive_signals_2025.csv] [--force]
+
+import argparse
+import time
+
+from app.history import store
+
+parser = argparse.ArgumentParser(description="Ingest weekly signals into the history store.")
+parser.add_argument("--csv", default="data/competitive_signals_2025.csv", help="weekly signals CSV (default: %(default)s)")
+parser.add_argument("--force", action="store_true", help="re-ingest weeks that are already stored")
+args = parser.parse_args()
+
+t0 = time.perf_counter()
+written = store.ingest_csv(args.csv, skip_existing=not args.force)
+weeks = store.weeks()
+print(f"✅ Ingested {len(written)} week(s) from {args.csv} in {time.perf_counter() - t0:.2f}s; "
+      f"{len(weeks)} stored under {store.root}" + (f" ({weeks[0]} … {weeks[-1]})" if weeks else ""))
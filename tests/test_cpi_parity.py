@@ -0,0 +1,61 @@
+# tests/test_cpi_parity.py
+"""cpi_batch (loader / generator) must score exactly like the scalar score_cpi."""
+import math
+
+import numpy as np
+import pytest
+
+from app.analytics import cpi_batch, score_cpi
+
+def _scalar(rows):
+    return [score_cpi(*r) for r in rows]
+
+def _batch(rows):
+    return cpi_batch(*(list(col) for col in zip(*rows))).tolist()
+
+def test_random_rows_match():
+    rng = np.random.default_rng(7)
+    n = 20_000
+    rows = list(zip(
+        rng.integers(-50, 400, n).tolist(),
+        rng.integers(0, 2, n).astype(bool).tolist(),
+        rng.integers(0, 15, n).tolist(),
+        # quarter steps land exactly on .5 after *10 → exercises half-even rounding
+        (rng.integers(-8, 48, n) / 4).tolist(),
+    ))
+    assert _batch(rows) == _scalar(rows)
+
+@pytest.mark.parametrize("row", [
+    (0, True, 10, 10.0),        # every term at its cap → 100
+    (10_000, False, 0, 0.0),    # every term at its floor → 0
+    (100, True, 100, 1e9),      # days term exactly 0, peer/ad past the cap
+    (-500, False, 0, 0.0),      # negative days: term capped at 100 by min(days, 100)
+    (365, False, 0, -40.0),     # negative ad → raw CPI below 0, clamped
+    (0, True, 10, 0.05),        # ad*10 == 0.5 → half-even
+    (0, True, 10, 0.15),
+    (0, True, 10, math.inf),    # +inf ad is capped at 100 by min()
+    (50.9, True, 3.99, 2.0),    # float counts truncate like int()
+    (30, None, 2, 1.0),         # None flag → False
+    (30, np.nan, 2, 1.0),       # NaN flag is truthy for bool()
+    (30, 1, 2, 1.0),
+])
+def test_edges_match(row):
+    assert _batch([row]) == _scalar([row])
+    assert 0 <= _batch([row])[0] <= 100
+
+@pytest.mark.parametrize("row", [
+    (np.nan, True, 1, 1.0),
+    (None, True, 1, 1.0),
+    (math.inf, True, 1, 1.0),
+    (10, True, np.nan, 1.0),
+    (10, True, None, 1.0),
+    (10, True, 1, np.nan),
+    (10, True, 1, None),
+    (10, True, 1, -math.inf),
+])
+def test_missing_values_raise_in_both(row):
+    with pytest.raises((ValueError, TypeError, OverflowError)):
+        score_cpi(*row)
+    # a mixed column (a good row next to the bad one) must not slip through either
+    with pytest.raises((ValueError, TypeError)):
+        _batch([(10, False, 1, 1.0), row])
@@ -0,0 +1,57 @@
+# tests/test_parallel_pool.py
+"""With SCORING_WORKERS > 0 the request paths must actually hash on the process pool."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import parallel, score_table
+from app.analytics import score_frame
+from app.config import settings
+
+@pytest.fixture
+def pool_calls(monkeypatch):
+    monkeypatch.setattr(settings, "SCORING_WORKERS", 2)
+    monkeypatch.setattr(settings, "SCORING_PARALLEL_MIN_ROWS", 100)
+    calls = []
+    real_map = parallel._map
+
+    def spy(fn, *args):
+        calls.append(fn.__name__)
+        return real_map(fn, *args)
+
+    monkeypatch.setattr(parallel, "_map", spy)
+    yield calls
+    parallel.shutdown()
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "customer_id": [f"C{i:06d}" for i in range(n)],
+        "region": np.array(["metro_north", "rural_east", "coastal"])[np.arange(n) % 3],
+        "CPI": np.arange(n) % 101,
+    })
+
+def test_score_table_build_uses_pool(pool_calls):
+    df = _frame(3000)
+    table = score_table.build(df)
+    assert pool_calls == ["_hash_shard"]
+    sev, crs, found = table.lookup(df["customer_id"], df["region"])
+    ref = score_frame(df)
+    assert found.all()
+    assert np.array_equal(sev, ref["Severity"].to_numpy())
+    assert np.array_equal(crs, ref["CRS"].to_numpy())
+
+def test_snapshot_path_hashes_missing_pairs_on_pool(pool_calls):
+    df = _frame(3000)
+    known = score_table.ScoreTable(key=np.array([], dtype="<U1"), severity=np.array([], dtype=np.int8),
+                                   crs=np.array([]))
+    out = parallel.score_frame_parallel(df, scores=known)
+    assert pool_calls == ["_hash_shard"]
+    pd.testing.assert_frame_equal(out, score_frame(df))
+
+def test_fully_covered_frame_stays_inline(pool_calls):
+    df = _frame(3000)
+    pool_calls.clear()
+    table = score_table.build(df)
+    pool_calls.clear()
+    pd.testing.assert_frame_equal(parallel.score_frame_parallel(df, scores=table), score_frame(df))
+    assert pool_calls == []  # nothing left to hash
@@ -0,0 +1,63 @@
+# tests/test_score_parity.py
+"""The columnar scorers (score_frame and its *_batch parts) must equal the scalar path bit for bit."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analytics import (
+    _round_ties, crs_0_1, crs_batch, final_risk, final_risk_batch, route_action, route_action_batch,
+    score_frame, severity_0_100, severity_batch,
+)
+
+REGIONS = ["metro_north", "metro_south", "rural_east", "coastal", "unknown", "région ✓"]
+
+@pytest.fixture(scope="module")
+def population():
+    rng = np.random.default_rng(11)
+    n = 20_000
+    ids = [f"C{i:07d}" for i in rng.choice(10_000_000, n, replace=False)] + ["", "x|y", "ü-42"]
+    regs = [REGIONS[i] for i in rng.integers(0, len(REGIONS), len(ids))]
+    cpi = rng.integers(0, 101, len(ids))
+    return ids, regs, cpi
+
+def _bits(a) -> np.ndarray:
+    return np.asarray(a, dtype=np.float64).view(np.int64)
+
+def test_severity_and_crs_match(population):
+    ids, regs, _ = population
+    assert severity_batch(ids, regs).tolist() == [severity_0_100(c, r) for c, r in zip(ids, regs)]
+    assert np.array_equal(_bits(crs_batch(ids)), _bits([crs_0_1(c) for c in ids]))
+
+def _final_risk_matches(cpi, sev, crs) -> None:
+    expected = [final_risk(int(a), int(b), float(c)) for a, b, c in zip(cpi.tolist(), sev.tolist(), crs.tolist())]
+    assert np.array_equal(_bits(final_risk_batch(cpi, sev, crs)), _bits(expected))
+
+def test_final_risk_full_grid_matches():
+    # every CPI x Severity x CRS (as crs_0_1 produces it: 2 decimals, <= 0.95)
+    cpi, sev, crs = np.meshgrid(np.arange(101), np.arange(101), np.arange(96) / 100, indexing="ij")
+    _final_risk_matches(cpi.ravel(), sev.ravel(), crs.ravel())
+
+def test_final_risk_tie_grid_matches():
+    # CRS in 1/4000 steps puts 20*CRS on x.xx5, the rounding ties final_risk_batch re-scores
+    cpi, sev, crs = np.meshgrid(np.arange(0, 101, 7), np.arange(0, 101, 9), np.arange(3801) / 4000, indexing="ij")
+    cpi, sev, crs = cpi.ravel(), sev.ravel(), crs.ravel()
+    assert _round_ties(0.5 * cpi + 0.3 * sev + 0.2 * (crs * 100), 2).sum() > 10_000
+    _final_risk_matches(cpi, sev, crs)
+
+def test_route_action_matches():
+    cpi, sev, crs = np.meshgrid(np.arange(0, 101, 5), np.arange(0, 101, 5), [0.0, 0.79, 0.8, 0.95], indexing="ij")
+    cpi, sev, crs = cpi.ravel(), sev.ravel(), crs.ravel()
+    got = route_action_batch(cpi, sev, crs)
+    expected = pd.DataFrame([route_action(int(a), int(b), float(c)) for a, b, c in zip(cpi, sev, crs)])
+    pd.testing.assert_frame_equal(got[expected.columns].reset_index(drop=True), expected, check_dtype=False)
+
+def test_score_frame_matches(population):
+    ids, regs, cpi = population
+    out = score_frame(pd.DataFrame({"customer_id": ids, "region": regs, "CPI": cpi}))
+    for i, (c, r, p) in enumerate(zip(ids, regs, cpi.tolist())):
+        sev, crs = severity_0_100(c, r), crs_0_1(c)
+        plan = route_action(p, sev, crs)
+        row = out.iloc[i]
+        assert (row["customer_id"], row["region"], row["CPI"], row["Severity"]) == (c, r, p, sev)
+        assert _bits([row["CRS"], row["final_score"]]).tolist() == _bits([crs, final_risk(p, sev, crs)]).tolist()
+        assert (row["action"], row["estimated_action_cost_usd"]) == (plan["action"], plan["estimated_action_cost_usd"])
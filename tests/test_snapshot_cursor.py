@@ -0,0 +1,31 @@
+# tests/test_snapshot_cursor.py
+"""Tampered /insights/top_risk cursors are a 400, never a 500."""
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import app
+from app.snapshot import decode_cursor
+
+def _cursor(**fields) -> str:
+    data = {"v": "1-2", "r": None, "s": 41.5, "c": "C000001", **fields}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+def test_well_formed_cursor_decodes():
+    assert decode_cursor(_cursor(r="metro_north", s=40))["s"] == 40
+
+@pytest.mark.parametrize("fields", [
+    {"s": "abc"}, {"s": None}, {"s": True}, {"s": float("nan")}, {"s": [1]},
+    {"c": 1}, {"c": None}, {"r": 5}, {"v": None}, {"v": 3},
+])
+def test_wrong_types_are_malformed(fields):
+    with pytest.raises(ValueError):
+        decode_cursor(_cursor(**fields))
+
+def test_tampered_cursor_is_400():
+    client = TestClient(app)
+    r = client.get("/insights/top_risk", params={"limit": 5, "cursor": _cursor(s="abc")})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "malformed cursor"
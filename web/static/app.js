@@ -8,24 +8,31 @@ function setStatus(txt, ok = true) {
   $('#status').style.color = ok ? '#56d364' : '#ff6b6b';
 }
 
-async function loadInsights() {
+// keyset pagination: the server hands back an opaque cursor for the next page
+let nextCursor = null;
+
+async function loadInsights(more = false) {
   const region = $('#region').value.trim();
-  const limit  = $('#limit').value.trim();
+  const limit  = $('#limit')?.value.trim() || '20';
   const auto_fix = $('#auto_fix').checked ? 'true' : 'false';
   const p = new URLSearchParams({ limit, auto_fix });
   if (region) p.append('region', region);
+  if (more && nextCursor) p.append('cursor', nextCursor);
 
   setStatus('Loading…');
   const res = await fetch(`/insights/top_risk?${p.toString()}`);
+  if (res.status === 410) { setStatus('Data was refreshed — reloading from the top', false); return loadInsights(); }
   if (!res.ok) { setStatus('Error loading insights', false); return; }
   const rows = await res.json();
-  renderRows(rows);
-  setStatus(`Loaded ${rows.length} rows`);
+  nextCursor = res.headers.get('X-Next-Cursor');
+  $('#moreBtn').disabled = !nextCursor;
+  renderRows(rows, more);
+  setStatus(`Loaded ${$$('#results tbody tr').length} rows`);
 }
 
-function renderRows(rows) {
+function renderRows(rows, append = false) {
   const tb = $('#results tbody');
-  tb.innerHTML = '';
+  if (!append) tb.innerHTML = '';
   rows.forEach((r, i) => {
     const pass = r.compliance?.pass;
     const v = (r.compliance?.violations || []).join(' · ');
@@ -106,6 +113,7 @@ $('#downloadBtn').onclick = () => {
   window.location = url; // triggers file download or shows JSON
 };
 
-$('#loadBtn').onclick = loadInsights;
+$('#loadBtn').onclick = () => loadInsights();
+$('#moreBtn').onclick = () => loadInsights(true);
 $('#approveSelectedBtn').onclick = approveSelected;
-document.addEventListener('DOMContentLoaded', loadInsights);
+document.addEventListener('DOMContentLoaded', () => loadInsights());